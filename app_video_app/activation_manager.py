@@ -1,28 +1,78 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import uuid
 import os
+import time
 
 API_URL = "https://script.google.com/macros/s/AKfycbw1jI4oqrBNd3FFDW0urshFliVKktaMrgST1fUNl3QsvyK6aMtftBwSq-ndNhhlnMpW/exec"
 DEVICE_ID_FILE = os.path.expanduser("~/.auto_video_device_id")
 
+# One pooled session for all activation calls so repeated requests to the
+# same host reuse the TCP/TLS connection instead of handshaking every time.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+_SESSION.headers.update({"Content-Type": "application/json", "User-Agent": "audc-activator/1.0"})
+_TIMEOUT = (3.05, 10)
+
+def close_session():
+    try:
+        _SESSION.close()
+    except Exception:
+        pass
+
+_DEVICE_ID = None
+
+def _read_device_id(tries=10, delay=0.05):
+    # the process that created the file may not have written the id yet
+    for _ in range(tries):
+        try:
+            with open(DEVICE_ID_FILE, "r") as f:
+                device_id = f.read().strip()
+        except FileNotFoundError:
+            device_id = ""
+        if device_id:
+            return device_id
+        time.sleep(delay)
+    return ""
+
 def get_device_id():
-    if os.path.exists(DEVICE_ID_FILE):
-        with open(DEVICE_ID_FILE, "r") as f:
-            return f.read().strip()
-    device_id = str(uuid.uuid4())
-    with open(DEVICE_ID_FILE, "w") as f:
-        f.write(device_id)
-    return device_id
+    global _DEVICE_ID
+    if _DEVICE_ID is not None:
+        return _DEVICE_ID
+    if not os.path.exists(DEVICE_ID_FILE):
+        device_id = str(uuid.uuid4())
+        try:
+            fd = os.open(DEVICE_ID_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # another process created it first; use its id below
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(device_id)
+            _DEVICE_ID = device_id
+            return _DEVICE_ID
+    device_id = _read_device_id()
+    if not device_id:
+        # still empty: its writer died before writing, so make a new id
+        device_id = str(uuid.uuid4())
+        with open(DEVICE_ID_FILE, "w") as f:
+            f.write(device_id)
+    _DEVICE_ID = device_id
+    return _DEVICE_ID
 
 def activate_key(key, device_name=""):
     device_id = get_device_id()
     try:
-        resp = requests.post(API_URL, json={
+        resp = _SESSION.post(API_URL, json={
             "action": "activate",
             "key": key,
             "device_id": device_id,
             "device_name": device_name
-        }, timeout=10)
+        }, timeout=_TIMEOUT)
         data = resp.json()
         return data
     except Exception as e:
@@ -31,11 +81,11 @@ def activate_key(key, device_name=""):
 def check_key_status(key):
     device_id = get_device_id()
     try:
-        resp = requests.post(API_URL, json={
+        resp = _SESSION.post(API_URL, json={
             "action": "check",
             "key": key,
             "device_id": device_id
-        }, timeout=10)
+        }, timeout=_TIMEOUT)
         data = resp.json()
         return data
     except Exception as e:
@@ -44,11 +94,11 @@ def check_key_status(key):
 def revoke_device(key):
     device_id = get_device_id()
     try:
-        resp = requests.post(API_URL, json={
+        resp = _SESSION.post(API_URL, json={
             "action": "revoke",
             "key": key,
             "device_id": device_id
-        }, timeout=10)
+        }, timeout=_TIMEOUT)
         data = resp.json()
         return data
     except Exception as e:
@@ -0,0 +1,85 @@
+# aq_common.py
+# Helpers shared by synth_aquestalk.py and the AquesTalk tools under aquestalk/
+# (those add this folder to sys.path):
+# - DROP_TABLE: str.translate table that keeps kana, allowed punctuation and whitespace
+#   (prefill_drop_table() fills its BMP part up front for callers with long inputs)
+# - KATA2HIRA: str.translate table for katakana -> hiragana
+# - parse_mecab_output(): concatenated readings from default-format mecab output
+# - save_raw_wav_bytes() / wav_params_and_frames(): AquesTalk WAV payload helpers
+
+import struct
+import wave
+
+ALLOWED_PUNCT = frozenset('\u3001\u3002\uFF1F\uFF01\u300C\u300D\u30FB\u3000\uFF0C\uFF08\uFF09\u300E\u300F\u30FC')
+
+# str.translate table: keeps kana, allowed punctuation and whitespace, drops the rest.
+# Entries are filled lazily the first time a codepoint is looked up.
+class _DropTable(dict):
+    def __missing__(self, cp):
+        ch = chr(cp)
+        v = cp if (0x3040 <= cp <= 0x30FF or ch in ALLOWED_PUNCT or ch.isspace()) else None
+        self[cp] = v
+        return v
+
+# brackets are dropped even though fullwidth parentheses are otherwise allowed
+DROP_TABLE = _DropTable.fromkeys(map(ord, '()（）[]［］'))
+
+def prefill_drop_table():
+    # Fill every BMP entry now (all allowed codepoints are in the BMP), so long
+    # inputs never hit __missing__ mid-translate; astral ones stay lazy.
+    for cp in range(0x10000):
+        if cp not in DROP_TABLE:
+            DROP_TABLE.__missing__(cp)
+
+# katakana -> hiragana is a fixed codepoint offset (ァ..ヶ, ヽヾ), same as jaconv.kata2hira
+KATA2HIRA = {cp: cp - 0x60 for cp in range(0x30A1, 0x30F7)}
+KATA2HIRA.update({0x30FD: 0x309D, 0x30FE: 0x309E})
+
+def parse_mecab_output(out_text):
+    # Concatenate readings from default-format mecab output ("surface\tfeatures" lines):
+    # IPADIC keeps the pronunciation at 7 and the reading at 6; unknown words fall back to the surface.
+    readings = []
+    for line in out_text.splitlines():
+        if line == 'EOS' or not line.strip():
+            continue
+        if '\t' in line:
+            surface, feats = line.split('\t', 1)
+            cols = feats.split(',', 8)  # reading fields are at 6/7; don't split the rest
+            if len(cols) > 7 and cols[7] and cols[7] != '*':
+                pron = cols[7]
+            elif len(cols) > 6 and cols[6] and cols[6] != '*':
+                pron = cols[6]
+            else:
+                pron = surface
+            readings.append(pron)
+        else:
+            readings.append(line.split(',', 1)[0])
+    return ''.join(readings)
+
+def save_raw_wav_bytes(raw_bytes, out_path):
+    # AquesTalk already returns a complete WAV file; only check the RIFF header
+    if raw_bytes[:4] != b'RIFF' or raw_bytes[8:12] != b'WAVE':
+        raise wave.Error("not a RIFF/WAVE payload")
+    with open(out_path, 'wb') as f:
+        f.write(raw_bytes)
+
+def wav_params_and_frames(raw_bytes):
+    # Walk the RIFF chunks for 'fmt ' and 'data' -> (nchannels, sampwidth, framerate, frames).
+    # frames is a memoryview of the PCM payload, so players get it without a copy.
+    fmt = None
+    pos = 12
+    end = len(raw_bytes)
+    while pos + 8 <= end:
+        cid, size = struct.unpack_from('<4sI', raw_bytes, pos)
+        body = pos + 8
+        if cid == b'fmt ':
+            nchannels, framerate = struct.unpack_from('<HI', raw_bytes, body + 2)
+            bits, = struct.unpack_from('<H', raw_bytes, body + 14)
+            fmt = (nchannels, bits // 8, framerate)
+        elif cid == b'data':
+            if fmt is None:
+                break
+            frames = memoryview(raw_bytes)[body:min(body + size, end)]
+            return fmt + (frames,)
+        pos = body + size + (size & 1)
+    raise wave.Error("fmt/data chunk not found")
\ No newline at end of file
@@ -1,42 +1,51 @@
+import re
+import unicodedata
+import functools
+
+try:
+    import jaconv
+except Exception:
+    jaconv = None
+
+# common mapping that fixes many AquesTalk voice issues; control chars and
+# ascii letters (A-Z, a-z) are dropped by the same table
+_TR = str.maketrans({
+    "ヂ": "ジ",
+    "ヅ": "ズ",
+    "ヴ": "ブ",
+    "ゔ": "ぶ",
+    "・": "、",
+    "〜": "ー",
+    "‐": "ー",
+})
+_TR.update(dict.fromkeys(range(0x00, 0x20)))
+_TR.update(dict.fromkeys(range(0x7F, 0xA0)))
+_TR.update(dict.fromkeys(map(ord, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")))
+_WS_RE = re.compile(r'\s+')
+
+# NFKC quick-check (Python 3.8+): skips the normalize call for text that is already NFKC
+_is_nfkc = getattr(unicodedata, "is_normalized", None)
+
+# pure on (text, to_hiragana); sentences are normalized again on every retry
+@functools.lru_cache(maxsize=256)
 def normalize_for_aquestalk(text: str, to_hiragana: bool = False) -> str:
     """
     Normalize katakana/hiragana text to reduce 'undefined symbol (105)' errors.
     - Replace characters known to cause issues in some AquesTalk voices.
     - Optionally convert katakana -> hiragana (to_hiragana=True).
     """
-    import re, unicodedata
-    try:
-        import jaconv
-    except Exception:
-        jaconv = None
-
     if not text:
         return text
 
-    # Unicode normalize
-    s = unicodedata.normalize("NFKC", text)
-
-    # common mapping that fixes many AquesTalk voice issues
-    mapping = {
-        "ヂ": "ジ",
-        "ヅ": "ズ",
-        "ヴ": "ブ",
-        "ゔ": "ぶ",
-        "・": "、",
-        "〜": "ー",
-        "‐": "ー",
-    }
-    for k, v in mapping.items():
-        s = s.replace(k, v)
-
-    # remove invisible/control chars
-    s = re.sub(r'[\u0000-\u001F\u007F-\u009F]', '', s)
-
-    # remove any ascii letters (A-Z, a-z) that might remain, or map them if you prefer
-    s = re.sub(r'[A-Za-z]', '', s)
+    # Unicode normalize, then apply the replacement mapping and drop
+    # invisible/control chars and ascii letters in one pass
+    if _is_nfkc is not None and _is_nfkc("NFKC", text):
+        s = text.translate(_TR)
+    else:
+        s = unicodedata.normalize("NFKC", text).translate(_TR)
 
     # collapse multiple spaces
-    s = re.sub(r'\s+', ' ', s).strip()
+    s = _WS_RE.sub(' ', s).strip()
 
     # optionally convert katakana -> hiragana (some voices expect hiragana)
     if to_hiragana and jaconv:
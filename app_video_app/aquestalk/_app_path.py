@@ -0,0 +1,11 @@
+# _app_path.py
+# Shared bootstrap for the scripts in this folder: importing it puts the
+# app_video_app folder (one level up) on sys.path once, so the scripts can
+# import the helpers that live there (aq_common.py, mecab_helper.py).
+
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.append(APP_DIR)
\ No newline at end of file
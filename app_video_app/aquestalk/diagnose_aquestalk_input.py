@@ -7,7 +7,10 @@
 # on segments split by punctuation, and on incremental prefixes to locate the
 # smallest substring that triggers AquesTalkError.
 
+import os
 import sys
+import re
+import json
 import unicodedata
 import traceback
 
@@ -20,6 +23,49 @@ except Exception:
 
 PUNCT = ('、','。','，','．','「','」','『','』','・','！','？',' ')  # split chars to try
 
+# Codepoints the GUI sanitizer lets through to AquesTalk: kana, Japanese punctuation,
+# prolonged mark and whitespace. Anything else is reported without calling the DLL.
+_ALLOWED_CPS = frozenset(range(0x3040, 0x3100)) | frozenset(map(ord, '\u3001\u3002\uFF1F\uFF01\u300C\u300D\u30FB\u3000\uFF0C\uFF08\uFF09\u300E\u300F\u30FC \t\n'))
+
+VOICE = 'f1'  # voice the diagnosis runs against
+
+# Per-character synth results, kept between runs so repeated sessions skip the DLL.
+# Results are grouped per DLL (path + mtime), so a replaced DLL is screened again.
+_CHAR_SCREEN_FILE = os.path.join(os.path.expanduser('~'), '.audc_char_screen.json')
+_CHAR_SCREEN = None  # {dll key: {char: ok}}
+
+def _dll_key(voice):
+    # same path aquestalk.load() uses for the voice
+    path = os.path.join(os.path.dirname(os.path.abspath(aquestalk.__file__)), voice, 'AquesTalk.dll')
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    return f"{path}|{mtime}"
+
+def _load_char_screen(dll_key):
+    global _CHAR_SCREEN
+    if _CHAR_SCREEN is None:
+        try:
+            with open(_CHAR_SCREEN_FILE, 'r', encoding='utf-8') as f:
+                _CHAR_SCREEN = {k: v for k, v in json.load(f).items() if isinstance(v, dict)}
+        except Exception:
+            _CHAR_SCREEN = {}
+    return _CHAR_SCREEN.setdefault(dll_key, {})
+
+def _save_char_screen():
+    try:
+        with open(_CHAR_SCREEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(_CHAR_SCREEN, f, ensure_ascii=False)
+    except Exception as e:
+        print("Cannot save char screen cache:", e)
+
+def _screenable(ch):
+    # only full-size kana letters are valid on their own; small kana, the
+    # prolonged mark and punctuation would fail alone without being at fault
+    name = unicodedata.name(ch, '')
+    return ('HIRAGANA LETTER' in name or 'KATAKANA LETTER' in name) and 'SMALL' not in name
+
 def show_chars(s):
     print("repr:", repr(s))
     print("length:", len(s))
@@ -42,8 +88,35 @@ def try_synth(aq, text, method='raw'):
         return False, e
 
 def find_bad_segment(aq, s):
+    # cheap screen first: a codepoint outside the allowed set is enough of an answer
+    for i, ch in enumerate(s):
+        if ord(ch) not in _ALLOWED_CPS:
+            print(f"Codepoint screen: [{i}] U+{ord(ch):04X} {ch!r} is outside the allowed set")
+            return ('codepoint_screen', i, ch, None)
+    # single-char screen, memoized on disk: one short synth per new kana
+    char_ok = _load_char_screen(_dll_key(VOICE))
+    changed = False
+    try:
+        for i, ch in enumerate(s):
+            if not _screenable(ch):
+                continue
+            ok = char_ok.get(ch)
+            if ok is None:
+                ok, err = try_synth(aq, ch, method='raw')
+                if not ok and not isinstance(err, AquesTalkError):
+                    # not an answer from the DLL (timeout, load error...): don't
+                    # cache it and leave this char to the segment search below
+                    print(f"Char screen: [{i}] {ch!r} not screened: {err}")
+                    continue
+                char_ok[ch] = ok
+                changed = True
+            if not ok:
+                print(f"Char screen: [{i}] U+{ord(ch):04X} {ch!r} fails on its own")
+                return ('char_screen', i, ch, None)
+    finally:
+        if changed:
+            _save_char_screen()
     # try segments split by punctuation
-    import re
     split_re = '[' + re.escape(''.join(PUNCT)) + ']+'
     parts = [p for p in re.split(split_re, s) if p]
     if not parts:
@@ -86,11 +159,11 @@ def main():
     if aquestalk is None:
         print("ERROR: cannot import aquestalk package. Make sure you run with the same Python used for GUI.")
         sys.exit(2)
-    # load a voice to test (try default f1)
+    # load a voice to test (default f1)
     try:
-        aq = aquestalk.load('f1')
+        aq = aquestalk.load(VOICE)
     except Exception as e:
-        print("Failed to load voice f1:", e)
+        print(f"Failed to load voice {VOICE}:", e)
         traceback.print_exc()
         sys.exit(3)
 
@@ -11,21 +11,37 @@
 
 import sys
 import re
-import io
-import wave
 
-import jaconv
 import aquestalk
 from aquestalk.aquestalk import AquesTalkError
 
+import _app_path  # puts app_video_app on sys.path for the shared helpers
+from aq_common import DROP_TABLE, KATA2HIRA, parse_mecab_output, save_raw_wav_bytes
+
 try:
     import MeCab
     _HAS_MECAB = True
 except Exception:
     _HAS_MECAB = False
 
-# Regex for allowed chars: hiragana, katakana, japanese punctuation, prolonged mark (ー) and spaces
-_ALLOWED_RE = re.compile(r'[^\u3040-\u309F\u30A0-\u30FF\u3001\u3002\uFF1F\uFF01\u300C\u300D\u30FB\u3000\uFF0C\uFF08\uFF09\u300E\u300F\u30FC\s]')
+try:
+    import jaconv
+except Exception:
+    jaconv = None
+
+# half-width digits -> full-width digits
+_DIGIT_H2Z = {ord(c): ord(f) for c, f in zip('0123456789', '０１２３４５６７８９')}
+# half-width katakana still needs jaconv (voiced marks combine with the previous char)
+_HALFWIDTH_KANA_RE = re.compile('[\uFF61-\uFF9F]')
+
+# MeCab.Tagger loads the dictionary on construction; create it once and reuse it
+_TAGGER = None
+
+def _get_tagger():
+    global _TAGGER
+    if _TAGGER is None:
+        _TAGGER = MeCab.Tagger()  # default ipadic if installed
+    return _TAGGER
 
 def mecab_to_hiragana(text):
     """
@@ -35,33 +51,12 @@ def mecab_to_hiragana(text):
     if not _HAS_MECAB:
         raise RuntimeError("MeCab not available. Install mecab and mecab-python3, or use fugashi instead.")
 
-    tagger = MeCab.Tagger()  # default ipadic if installed
-    # Ensure parse output encoding is str on Python3
-    node = tagger.parseToNode(text)
-    parts = []
-    while node:
-        # skip BOS/EOS nodes
-        if node.surface:
-            feature = node.feature  # csv-like string for ipadic
-            pron = None
-            if feature:
-                # feature format depends on dict:
-                # - IPADIC: feature.split(',')[7] often holds "pronunciation" or reading
-                # - UniDic: format may differ; try multiple indices/keys
-                cols = feature.split(',')
-                # try common index 7, 8
-                if len(cols) > 7 and cols[7] and cols[7] != '*':
-                    pron = cols[7]
-                elif len(cols) > 6 and cols[6] and cols[6] != '*':
-                    # fallback to index 6
-                    pron = cols[6]
-            if not pron or pron == '*':
-                pron = node.surface
-            parts.append(pron)
-        node = node.next
-    katakana = ''.join(parts)
+    # one Tagger.parse call returns the whole analysis as text; reading columns:
+    # - IPADIC: feature.split(',')[7] often holds "pronunciation" or reading
+    # - UniDic: format may differ; fall back to index 6, then the surface
+    katakana = parse_mecab_output(_get_tagger().parse(text))
     # Convert katakana -> hiragana for AquesTalk safety
-    hiragana = jaconv.kata2hira(katakana)
+    hiragana = katakana.translate(KATA2HIRA)
     return hiragana
 
 def sanitize_for_aquestalk(text):
@@ -70,25 +65,16 @@ def sanitize_for_aquestalk(text):
     # Convert ascii punctuation to Japanese punctuation
     text = text.replace(',', '、').replace('?', '？').replace('!', '！').replace('.', '。')
     # Convert half-width digits to full-width digits (optional)
-    text = jaconv.h2z(text, digit=True, ascii=False)
-    # Remove parentheses (ASCII and fullwidth)
-    text = re.sub(r'[\(\)（）［］\[\]]', '', text)
-    # Remove characters not allowed
-    cleaned = _ALLOWED_RE.sub('', text)
+    text = text.translate(_DIGIT_H2Z)
+    if jaconv is not None and _HALFWIDTH_KANA_RE.search(text):
+        text = jaconv.h2z(text, kana=True, ascii=False)
+    # Remove parentheses (ASCII and fullwidth) and characters not allowed
+    cleaned = text.translate(DROP_TABLE)
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     # Convert katakana -> hiragana
-    cleaned = jaconv.kata2hira(cleaned)
+    cleaned = cleaned.translate(KATA2HIRA)
     return cleaned
 
-def save_raw_wav_bytes(raw_bytes, out_path):
-    with wave.open(io.BytesIO(raw_bytes), 'rb') as r:
-        frames = r.readframes(r.getnframes())
-        with wave.open(out_path, 'wb') as wf:
-            wf.setnchannels(r.getnchannels())
-            wf.setsampwidth(r.getsampwidth())
-            wf.setframerate(r.getframerate())
-            wf.writeframes(frames)
-
 def main():
     if len(sys.argv) < 2:
         print("Usage: python example_synth_mecab.py \"TEXT\" [out.wav] [voice]")
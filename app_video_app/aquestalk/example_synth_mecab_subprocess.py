@@ -12,82 +12,39 @@
 # - pip install jaconv
 
 import sys
-import subprocess
 import re
-import io
-import wave
 import jaconv
 
 import aquestalk
 from aquestalk.aquestalk import AquesTalkError
 
-_ALLOWED_RE = re.compile(r'[^\u3040-\u309F\u30A0-\u30FF\u3001\u3002\uFF1F\uFF01\u300C\u300D\u30FB\u3000\uFF0C\uFF08\uFF09\u300E\u300F\u30FC\s]')
+import _app_path  # puts app_video_app on sys.path for the shared helpers
+from aq_common import DROP_TABLE, parse_mecab_output, save_raw_wav_bytes
+from mecab_helper import mecab_parse
 
 def mecab_reading_via_subprocess_utf8(text, mecab_path='mecab'):
     """
-    Call mecab.exe via subprocess using UTF-8 encoding for both stdin and stdout.
+    Call mecab.exe (kept alive across calls) using UTF-8 encoding for both stdin and stdout.
     Returns katakana string (concatenated readings).
     """
-    # encode input as UTF-8 bytes
-    input_bytes = text.encode('utf-8')
-    proc = subprocess.Popen([mecab_path],
-                            stdin=subprocess.PIPE,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE)
-    stdout_bytes, stderr_bytes = proc.communicate(input_bytes)
-
-    if proc.returncode != 0:
-        # try to decode stderr as utf-8 for readable message
-        try:
-            stderr_text = stderr_bytes.decode('utf-8', errors='replace')
-        except Exception:
-            stderr_text = repr(stderr_bytes)
-        raise RuntimeError(f"mecab failed (returncode={proc.returncode}): {stderr_text.strip()}")
+    # UTF-8 input bytes go through the persistent mecab process
+    stdout_bytes = mecab_parse(text, mecab_path=mecab_path)
 
     # decode stdout as utf-8
     stdout_text = stdout_bytes.decode('utf-8', errors='replace')
 
-    readings = []
-    for line in stdout_text.splitlines():
-        if line == 'EOS' or not line.strip():
-            continue
-        if '\t' in line:
-            surface, feats = line.split('\t', 1)
-            cols = feats.split(',')
-            pron = None
-            if len(cols) > 7 and cols[7] != '*':
-                pron = cols[7]
-            elif len(cols) > 6 and cols[6] != '*':
-                pron = cols[6]
-            else:
-                pron = surface
-            readings.append(pron)
-        else:
-            parts = line.split(',')
-            if parts:
-                readings.append(parts[0])
-    katakana = ''.join(readings)
+    katakana = parse_mecab_output(stdout_text)
     return katakana
 
 def sanitize_for_aquestalk(text):
     text = text.replace('-', 'ー')
     text = text.replace(',', '、').replace('?', '？').replace('!', '！').replace('.', '。')
     text = jaconv.h2z(text, digit=True, ascii=False)
-    text = re.sub(r'[\(\)（）\[\]［］]', '', text)
-    cleaned = _ALLOWED_RE.sub('', text)
+    cleaned = text.translate(DROP_TABLE)
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     cleaned = jaconv.kata2hira(cleaned)
     return cleaned
 
-def save_raw_wav_bytes(raw_bytes, out_path):
-    with wave.open(io.BytesIO(raw_bytes), 'rb') as r:
-        frames = r.readframes(r.getnframes())
-        with wave.open(out_path, 'wb') as wf:
-            wf.setnchannels(r.getnchannels())
-            wf.setsampwidth(r.getsampwidth())
-            wf.setframerate(r.getframerate())
-            wf.writeframes(frames)
-
 def main():
     if len(sys.argv) < 2:
         print("Usage: python example_synth_mecab_subprocess.py \"TEXT\" [out.wav] [mecab_path] [voice]")
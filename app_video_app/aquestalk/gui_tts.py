@@ -17,6 +17,9 @@ import wave
 import tempfile
 import threading
 import subprocess
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import shutil
 import traceback
 import tkinter as tk
@@ -49,33 +52,59 @@ except Exception:
     aquestalk = None
     AquesTalkError = Exception
 
+import _app_path  # puts app_video_app on sys.path for the shared helpers
+from aq_common import DROP_TABLE, KATA2HIRA, parse_mecab_output, prefill_drop_table, save_raw_wav_bytes, wav_params_and_frames
+from mecab_helper import mecab_parse
+
 import re
-_ALLOWED_RE = re.compile(r'[^\u3040-\u309F\u30A0-\u30FF\u3001\u3002\uFF1F\uFF01\u300C\u300D\u30FB\u3000\uFF0C\uFF08\uFF09\u300E\u300F\u30FC\s]')
+# Whole pasted paragraphs go through DROP_TABLE, so fill its BMP part up front.
+prefill_drop_table()
+
+# MeCab.Tagger loads the dictionary on construction, so build it once and reuse it.
+# The lock also serializes parsing because Play/Save run synthesis on worker threads.
+_TAGGER = None
+_TAGGER_LOCK = threading.Lock()
+
+def _get_tagger():
+    global _TAGGER
+    if _TAGGER is None:
+        _TAGGER = MeCab.Tagger()
+    return _TAGGER
+
+# '-Oyomi' makes MeCab print the reading itself (one line per input line).
+# Not every dictionary defines that format; False marks "unsupported".
+_YOMI_TAGGER = None
+
+def _get_yomi_tagger():
+    global _YOMI_TAGGER
+    if _YOMI_TAGGER is None:
+        try:
+            _YOMI_TAGGER = MeCab.Tagger('-Oyomi')
+        except Exception:
+            _YOMI_TAGGER = False
+    return _YOMI_TAGGER or None
 
 def mecab_to_hiragana(text):
+    return _mecab_to_hiragana_cached(text)
+
+# Play is often pressed repeatedly on the same text while tweaking voice/speed,
+# so readings are memoized per input string.
+@functools.lru_cache(maxsize=128)
+def _mecab_to_hiragana_cached(text):
     # Use mecab-python3 if available
     if _HAS_MECAB and MeCab is not None:
-        tagger = MeCab.Tagger()
-        node = tagger.parseToNode(text)
-        parts = []
-        while node:
-            if node.surface:
-                feature = node.feature or ''
-                cols = feature.split(',')
-                pron = None
-                if len(cols) > 7 and cols[7] and cols[7] != '*':
-                    pron = cols[7]
-                elif len(cols) > 6 and cols[6] and cols[6] != '*':
-                    pron = cols[6]
-                else:
-                    pron = node.surface
-                parts.append(pron)
-            node = node.next
-        katakana = ''.join(parts)
-        if jaconv:
-            return jaconv.kata2hira(katakana)
+        with _TAGGER_LOCK:
+            yomi = _get_yomi_tagger()
+            if yomi is not None:
+                out = yomi.parse(text)
+            else:
+                # one Tagger.parse call returns the whole analysis as text
+                out = _get_tagger().parse(text)
+        if yomi is not None:
+            katakana = ''.join(out.splitlines())
         else:
-            return katakana
+            katakana = parse_mecab_output(out)
+        return katakana.translate(KATA2HIRA)
     # Fallback: try calling mecab executable (works on Windows if mecab.exe installed)
     if shutil.which('mecab'):
         return mecab_reading_via_subprocess_utf8(text, mecab_path='mecab')
@@ -83,42 +112,16 @@ def mecab_to_hiragana(text):
     return text
 
 def mecab_reading_via_subprocess_utf8(text, mecab_path='mecab'):
-    # Call mecab via subprocess, pass UTF-8 input bytes, decode stdout as UTF-8
-    input_bytes = text.encode('utf-8')
-    proc = subprocess.Popen([mecab_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout_bytes, stderr_bytes = proc.communicate(input_bytes)
-    if proc.returncode != 0:
-        try:
-            stderr_text = stderr_bytes.decode('utf-8', errors='replace')
-        except Exception:
-            stderr_text = repr(stderr_bytes)
-        raise RuntimeError(f"mecab failed (returncode={proc.returncode}): {stderr_text.strip()}")
+    # Feed the persistent mecab process UTF-8 input, decode stdout as UTF-8
+    stdout_bytes = mecab_parse(text, mecab_path=mecab_path)
     stdout_text = stdout_bytes.decode('utf-8', errors='replace')
-    readings = []
-    for line in stdout_text.splitlines():
-        if line == 'EOS' or not line.strip():
-            continue
-        if '\t' in line:
-            surface, feats = line.split('\t', 1)
-            cols = feats.split(',')
-            pron = None
-            if len(cols) > 7 and cols[7] != '*':
-                pron = cols[7]
-            elif len(cols) > 6 and cols[6] != '*':
-                pron = cols[6]
-            else:
-                pron = surface
-            readings.append(pron)
-        else:
-            parts = line.split(',')
-            if parts:
-                readings.append(parts[0])
-    katakana = ''.join(readings)
+    katakana = parse_mecab_output(stdout_text)
     if jaconv:
         return jaconv.kata2hira(katakana)
     else:
         return katakana
 
+@functools.lru_cache(maxsize=128)
 def sanitize_for_aquestalk(text):
     # Convert ascii hyphen to prolonged mark, ascii punctuation to Japanese punctuation,
     # convert digits to fullwidth, remove parentheses, remove unsupported chars, convert katakana->hiragana.
@@ -128,34 +131,27 @@ def sanitize_for_aquestalk(text):
     text = text.replace(',', '、').replace('?', '？').replace('!', '！').replace('.', '。')
     if jaconv:
         text = jaconv.h2z(text, digit=True, ascii=False)
-    text = re.sub(r'[\(\)（）\[\]［］]', '', text)
-    cleaned = _ALLOWED_RE.sub('', text)
+    cleaned = text.translate(DROP_TABLE)
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     if jaconv:
         cleaned = jaconv.kata2hira(cleaned)
     return cleaned
 
-def save_raw_wav_bytes(raw_bytes, out_path):
-    with wave.open(io.BytesIO(raw_bytes), 'rb') as r:
-        frames = r.readframes(r.getnframes())
-        with wave.open(out_path, 'wb') as wf:
-            wf.setnchannels(r.getnchannels())
-            wf.setsampwidth(r.getsampwidth())
-            wf.setframerate(r.getframerate())
-            wf.writeframes(frames)
-
 def play_raw_wav_bytes(raw_bytes):
-    try:
-        with wave.open(io.BytesIO(raw_bytes), 'rb') as wf:
-            frames = wf.readframes(wf.getnframes())
-            nchannels = wf.getnchannels()
-            sampwidth = wf.getsampwidth()
-            framerate = wf.getframerate()
-    except Exception as e:
-        raise RuntimeError("Invalid WAV bytes: " + str(e))
+    if raw_bytes[:4] != b'RIFF' or raw_bytes[8:12] != b'WAVE':
+        raise RuntimeError("Invalid WAV bytes: missing RIFF/WAVE header")
 
     if _HAS_SIMPLEAUDIO:
         try:
+            try:
+                nchannels, sampwidth, framerate, frames = wav_params_and_frames(raw_bytes)
+            except Exception:
+                # non-canonical header: let the wave module sort it out
+                with wave.open(io.BytesIO(raw_bytes), 'rb') as wf:
+                    frames = wf.readframes(wf.getnframes())
+                    nchannels = wf.getnchannels()
+                    sampwidth = wf.getsampwidth()
+                    framerate = wf.getframerate()
             play_obj = sa.play_buffer(frames, nchannels, sampwidth, framerate)
             play_obj.wait_done()
             return
@@ -183,6 +179,53 @@ def play_raw_wav_bytes(raw_bytes):
         except Exception:
             pass
 
+# Loading a voice initializes its DLL; keep one instance per voice name.
+# A per-voice lock makes sure two threads never initialize the same DLL at once,
+# while different voices can still load in parallel.
+_VOICE_LOCKS = {}
+_VOICE_LOCKS_GUARD = threading.Lock()
+
+@functools.lru_cache(maxsize=8)
+def _load_voice_cached(voice):
+    return aquestalk.load(voice)
+
+def _load_voice(voice):
+    with _VOICE_LOCKS_GUARD:
+        lock = _VOICE_LOCKS.setdefault(voice, threading.Lock())
+    with lock:
+        return _load_voice_cached(voice)
+
+# Synthesized WAV bytes keyed by (voice, speed, sanitized text), LRU-evicted by total size.
+_SYNTH_CACHE = OrderedDict()
+_SYNTH_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_SYNTH_CACHE_LOCK = threading.Lock()
+_synth_cache_bytes = 0
+
+def _synth_cache_get(key):
+    with _SYNTH_CACHE_LOCK:
+        raw = _SYNTH_CACHE.get(key)
+        if raw is not None:
+            _SYNTH_CACHE.move_to_end(key)
+        return raw
+
+def _synth_cache_put(key, raw):
+    global _synth_cache_bytes
+    with _SYNTH_CACHE_LOCK:
+        old = _SYNTH_CACHE.pop(key, None)
+        if old is not None:
+            _synth_cache_bytes -= len(old)
+        _SYNTH_CACHE[key] = raw
+        _synth_cache_bytes += len(raw)
+        while _synth_cache_bytes > _SYNTH_CACHE_MAX_BYTES and len(_SYNTH_CACHE) > 1:
+            _, v = _SYNTH_CACHE.popitem(last=False)
+            _synth_cache_bytes -= len(v)
+
+def _synth_cache_clear():
+    global _synth_cache_bytes
+    with _SYNTH_CACHE_LOCK:
+        _SYNTH_CACHE.clear()
+        _synth_cache_bytes = 0
+
 class AquesTalkGUI:
     def __init__(self, root):
         self.root = root
@@ -223,29 +266,41 @@ class AquesTalkGUI:
         self.play_btn.pack(side=tk.LEFT, padx=6)
         self.save_btn = ttk.Button(buttons, text="Save...", command=self.on_save)
         self.save_btn.pack(side=tk.LEFT)
+        self.clear_cache_btn = ttk.Button(buttons, text="Clear cache", command=self.on_clear_cache)
+        self.clear_cache_btn.pack(side=tk.LEFT, padx=6)
         self.status = ttk.Label(main, text="Ready", anchor='w')
         self.status.pack(fill=tk.X, pady=(8,0))
 
         self.refresh_voices()
 
     def set_status(self, msg):
-        self.status.config(text=msg)
-        self.root.update_idletasks()
+        # called from worker threads too: hand the update to the Tk loop and let
+        # it repaint on its own instead of forcing a layout pass per message
+        self.root.after(0, lambda: self.status.config(text=msg))
 
     def refresh_voices(self):
-        voices = []
         if aquestalk is None:
             messagebox.showerror("Error", "Cannot import aquestalk. Make sure the package is on PYTHONPATH.")
             self.voice_combo['values'] = []
             return
-        for v in ['f1','f2','f3','f4','f5','f6','f7','f8']:
-            try:
-                _ = aquestalk.load(v)
-                voices.append(v)
-            except Exception:
-                continue
+        # loading DLLs can take a while; keep the window responsive
+        t = threading.Thread(target=self._bg_refresh_voices, daemon=True)
+        t.start()
+
+    def _bg_refresh_voices(self):
+        voices = []
+        candidates = ['f1','f2','f3','f4','f5','f6','f7','f8']
+        # probe the DLLs concurrently; results keep the candidate order
+        with ThreadPoolExecutor(max_workers=len(candidates)) as ex:
+            futs = [(v, ex.submit(_load_voice, v)) for v in candidates]
+            for v, fut in futs:
+                if fut.exception() is None:
+                    voices.append(v)
         if not voices:
-            voices = ['f1','f2','f3','f4','f5','f6','f7','f8']
+            voices = candidates
+        self.root.after(0, lambda vs=voices: self._set_voices(vs))
+
+    def _set_voices(self, voices):
         self.voice_combo['values'] = voices
         self.voice_combo.set(voices[0])
 
@@ -268,11 +323,16 @@ class AquesTalkGUI:
         self.set_status("Sanitized length: " + str(len(sanitized)))
         if not sanitized:
             raise RuntimeError("Sanitized text empty or invalid for AquesTalk. Try providing kana or install MeCab.")
-        aq = aquestalk.load(voice)
+        key = (voice, int(speed), sanitized)
+        raw = _synth_cache_get(key)
+        if raw is not None:
+            return raw
+        aq = _load_voice(voice)
         try:
             raw = aq.synthe_raw(sanitized, speed=int(speed))
         except TypeError:
             raw = aq.synthe_raw(sanitized)
+        _synth_cache_put(key, raw)
         return raw
 
     def _synthesize_and_play(self, text, voice, speed):
@@ -306,6 +366,13 @@ class AquesTalkGUI:
         t = threading.Thread(target=self._synthesize_and_play, args=(text, voice, speed), daemon=True)
         t.start()
 
+    def on_clear_cache(self):
+        # e.g. after reinstalling the MeCab dictionary
+        _mecab_to_hiragana_cached.cache_clear()
+        sanitize_for_aquestalk.cache_clear()
+        _synth_cache_clear()
+        self.set_status("Cache cleared")
+
     def on_save(self):
         text = self.text.get('1.0', 'end').strip()
         if not text:
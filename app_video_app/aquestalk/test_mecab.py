@@ -3,7 +3,9 @@
 # Kiểm tra MeCab + mecab-python3 trong Python
 # Chạy: "C:\...\Python313-32\python.exe" test_mecab.py
 
+import re
 import sys
+from functools import lru_cache
 
 try:
     import MeCab
@@ -11,35 +13,78 @@ except Exception as e:
     print("MeCab binding IMPORT ERROR:", e)
     sys.exit(1)
 
-s = "なあ霊夢、ルークスが受注開始からわずか1か月で1万台超えって話、もう聞いたか？"
-print("Input:", s)
-tagger = MeCab.Tagger()
-# In toàn bộ parse (morph + features)
-print("MeCab parse output:")
-print(tagger.parse(s))
-
-# Lấy reading (pronunciation) từng node
-node = tagger.parseToNode(s)
-readings = []
-while node:
-    if node.surface:
-        feat = node.feature or ''
-        cols = feat.split(',')
-        pron = None
-        if len(cols) > 7 and cols[7] != '*':
-            pron = cols[7]
-        elif len(cols) > 6 and cols[6] != '*':
-            pron = cols[6]
-        else:
-            pron = node.surface
-        readings.append(pron)
-    node = node.next
-
-katakana = ''.join(readings)
-print("Katakana reading:", katakana)
-# Nếu muốn hiragana:
-try:
-    import jaconv
-    print("Hiragana:", jaconv.kata2hira(katakana))
-except Exception:
-    pass
\ No newline at end of file
+import _app_path  # thêm thư mục app_video_app vào sys.path (bảng KATA2HIRA dùng chung ở aq_common.py)
+from aq_common import KATA2HIRA
+
+def kata2hira(s):
+    return s.translate(KATA2HIRA)
+
+# Tagger nạp từ điển khi khởi tạo -> chỉ tạo một lần rồi dùng lại
+@lru_cache(maxsize=1)
+def _get_tagger():
+    return MeCab.Tagger()
+
+# MeCab tự in mỗi từ một dòng "surface<TAB>%f[7]" (IPADIC pronunciation), từ lạ
+# chỉ in surface, EOS thành dòng trống -> Python chỉ cần ghép chuỗi
+@lru_cache(maxsize=1)
+def _get_reading_tagger():
+    return MeCab.Tagger('-F%m\\t%f[7]\\n -U%m\\n -E\\n')
+
+# Chỉ cần tách từ (không cần reading): -Owakati in surface cách nhau bằng dấu cách,
+# MeCab không phải dựng chuỗi feature
+@lru_cache(maxsize=1)
+def _get_wakati_tagger():
+    return MeCab.Tagger('-Owakati')
+
+def extract_tokens(s):
+    # Danh sách surface của các từ
+    return _get_wakati_tagger().parse(s).split()
+
+# dòng "surface<TAB>reading"; reading '*' = từ không có reading -> dùng surface
+_READING_LINE_RE = re.compile(r'^([^\t\n]*)\t([^\n]*)$', re.M)
+
+def _pick_reading(m):
+    reading = m.group(2)
+    return m.group(1) if reading == '*' else reading
+
+def _join_readings(out):
+    # ghép các dòng reading bằng thao tác chuỗi, không tạo list từng token
+    return _READING_LINE_RE.sub(_pick_reading, out).replace('\n', '')
+
+def extract_readings(s):
+    # Lấy reading (pronunciation) cho cả câu
+    return _join_readings(_get_reading_tagger().parse(s))
+
+# Ký tự phân cách câu (U+241E), có khoảng trắng hai bên để MeCab tách riêng
+# thành một từ lạ -> in ra nguyên surface trên một dòng
+_SENT = '\u241E'
+
+def get_readings_batch(texts):
+    # Nhiều câu trong một lần parse thay vì gọi Tagger cho từng câu
+    if not texts:
+        return []
+    out = _get_reading_tagger().parse((' ' + _SENT + ' ').join(texts))
+    # mỗi dấu phân cách nằm riêng một dòng
+    parts = ('\n' + out).split('\n' + _SENT + '\n')
+    return [_join_readings(p) for p in parts]
+
+def main():
+    s = "なあ霊夢、ルークスが受注開始からわずか1か月で1万台超えって話、もう聞いたか？"
+    print("Input:", s)
+    # In toàn bộ parse (morph + features)
+    print("MeCab parse output:")
+    print(_get_tagger().parse(s))
+    print("Tokens:", ' / '.join(extract_tokens(s)))
+
+    katakana = extract_readings(s)
+    print("Katakana reading:", katakana)
+    # Nếu muốn hiragana:
+    print("Hiragana:", kata2hira(katakana))
+
+    # Nhiều vế một lần: mỗi vế (tách ở dấu 、) lấy reading qua một lần parse
+    clauses = s.split('、')
+    for clause, reading in zip(clauses, get_readings_batch(clauses)):
+        print(f"  {clause} -> {reading}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
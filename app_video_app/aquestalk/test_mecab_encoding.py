@@ -2,60 +2,138 @@
 # test_mecab_encoding.py
 # Gọi mecab.exe qua subprocess với nhiều encoding khác nhau,
 # in ra stdout bytes (hex) và thử decode bằng nhiều encodings để xem cái nào cho output hợp lệ.
+# Mỗi encoding chạy một tiến trình mecab riêng để returncode/stderr là của đúng lần thử đó.
+# Encoding của từ điển (mecab -D) được thử trước, rồi tới encoding mà charset_normalizer
+# đoán từ output; dừng ở lần parse sạch đầu tiên. Thêm --all để thử hết mọi encoding.
 
+import codecs
 import subprocess
 import binascii
+import shutil
 import sys
 
+try:
+    import charset_normalizer
+except Exception:
+    charset_normalizer = None
+
 text = "なあ霊夢、ルークスが受注開始からわずか1か月で1万台超えって話、もう聞いたか？"
 mecab_path = "mecab"  # hoặc full path "C:\\Program Files (x86)\\MeCab\\bin\\mecab.exe"
+# tìm trong PATH một lần (trên Windows mỗi lần tìm phải thử từng PATHEXT)
+_MECAB = shutil.which(mecab_path) or mecab_path
+
+# (tên hiển thị, encoding)
+_CANDIDATES = (
+    ("cp932 (shift_jis)", "cp932"),
+    ("utf-8", "utf-8"),
+    ("euc_jp", "euc_jp"),
+    ("iso2022_jp", "iso2022_jp"),
+    ("latin1 (pass-through)", "latin1"),
+)
 
 def run_with_input_bytes(input_bytes):
-    proc = subprocess.Popen([mecab_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    proc = subprocess.Popen([_MECAB], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     stdout, stderr = proc.communicate(input_bytes)
     return proc.returncode, stdout, stderr
 
-def try_encodings_and_print():
-    candidates = [
-        ("cp932 (shift_jis)", None, "cp932"),
-        ("utf-8", None, "utf-8"),
-        ("euc_jp", None, "euc_jp"),
-        ("iso2022_jp", None, "iso2022_jp"),
-        ("latin1 (pass-through)", None, "latin1"),
-    ]
+def dict_charset():
+    # "charset:" dòng trong output của mecab -D (thông tin từ điển), None nếu không đọc được
+    try:
+        out = subprocess.run([_MECAB, "-D"], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10).stdout
+    except Exception:
+        return None
+    for line in out.decode("latin1").splitlines():
+        if line.lower().startswith("charset:"):
+            return _candidate_for(line.split(":", 1)[1].strip())
+    return None
+
+def _candidate_for(name):
+    # tên charset (mecab hoặc charset_normalizer) -> encoding trong _CANDIDATES
+    try:
+        enc = codecs.lookup(name).name
+    except (LookupError, TypeError):
+        return None
+    enc = {"shift_jis": "cp932", "euc-jp": "euc_jp", "iso2022-jp": "iso2022_jp", "iso8859-1": "latin1"}.get(enc, enc)
+    return enc if any(enc == e for _, e in _CANDIDATES) else None
+
+def is_clean_parse(ret, stdout, enc):
+    # mecab thoát bình thường, output decode được bằng chính encoding đó, kết thúc bằng EOS
+    # và ghép các surface lại đúng bằng câu gốc (mecab bỏ khoảng trắng)
+    if ret != 0:
+        return False
+    try:
+        lines = stdout.decode(enc).splitlines()
+    except UnicodeDecodeError:
+        return False
+    if not lines or lines[-1] != "EOS":
+        return False
+    surfaces = "".join(line.split("\t", 1)[0] for line in lines[:-1])
+    return surfaces == "".join(text.split())
+
+def probe(name, enc, b):
+    print("=================================================================")
+    print(f"Input encoded as {name} ({enc}), length={len(b)}")
+    ret, stdout, stderr = run_with_input_bytes(b)
+    print(f"mecab returncode: {ret}")
+    if stderr:
+        # try to decode stderr for readability
+        try:
+            print("stderr (decoded cp932):", stderr.decode('cp932', errors='replace'))
+        except:
+            print("stderr (repr):", repr(stderr))
+    print("stdout bytes (hex, first 200 bytes):", binascii.hexlify(stdout[:200]))
+    guess = None
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(stdout).best()
+        guess = best.encoding if best else None
+        print("charset_normalizer guess:", guess)
+    # only the first 6 lines are printed, so only decode those; splitting the
+    # bytes on b'\n' is safe because no candidate uses 0x0A inside a character
+    head = b'\n'.join(stdout.split(b'\n', 6)[:6])
+    # try various decodings for stdout
+    for try_enc in ("cp932", "utf-8", "euc_jp", "iso2022_jp", "latin1"):
+        try:
+            s = head.decode(try_enc)
+            # print only first 6 lines to keep console readable
+            snippet = "\\n".join(s.splitlines()[:6])
+            print(f"decoded as {try_enc}:")
+            print(snippet)
+        except Exception as e:
+            print(f"decoded as {try_enc} FAILED: {e}")
+    clean = is_clean_parse(ret, stdout, enc)
+    print("clean parse:", clean)
+    print()
+    return clean, _candidate_for(guess) if guess else None
 
-    for name, _, enc in candidates:
+def try_encodings_and_print(try_all=False):
+    names = dict((enc, name) for name, enc in _CANDIDATES)
+    order = [enc for _, enc in _CANDIDATES]
+    first = dict_charset()
+    if first is not None:
+        print(f"dictionary charset (mecab -D): {first}")
+        order.remove(first)
+        order.insert(0, first)
+    while order:
+        enc = order.pop(0)
         try:
             b = text.encode(enc)
         except Exception as e:
-            print(f"--- encode with {name} FAILED: {e}")
+            print(f"--- encode with {names[enc]} FAILED: {e}")
             continue
-        print("=================================================================")
-        print(f"Input encoded as {name} ({enc}), length={len(b)}")
-        ret, stdout, stderr = run_with_input_bytes(b)
-        print(f"mecab returncode: {ret}")
-        if stderr:
-            # try to decode stderr for readability
-            try:
-                print("stderr (decoded cp932):", stderr.decode('cp932', errors='replace'))
-            except:
-                print("stderr (repr):", repr(stderr))
-        print("stdout bytes (hex, first 200 bytes):", binascii.hexlify(stdout[:200]))
-        # try various decodings for stdout
-        for try_enc in ("cp932", "utf-8", "euc_jp", "iso2022_jp", "latin1"):
-            try:
-                s = stdout.decode(try_enc)
-                # print only first 3 lines to keep console readable
-                snippet = "\\n".join(s.splitlines()[:6])
-                print(f"decoded as {try_enc}:")
-                print(snippet)
-            except Exception as e:
-                print(f"decoded as {try_enc} FAILED: {e}")
-        print()
+        clean, guess = probe(names[enc], enc, b)
+        if clean and not try_all:
+            print(f"mecab parses input encoded as {enc} cleanly; stopping (use --all to try every encoding)")
+            return
+        if guess in order:
+            # mecab answers in its dictionary charset: try the guessed one next
+            order.remove(guess)
+            order.insert(0, guess)
+    if not try_all:
+        print("no encoding gave a clean parse")
 
 if __name__ == '__main__':
     print("Running MeCab encoding diagnostics for text:")
     print(text)
     print()
-    try_encodings_and_print()
+    try_encodings_and_print(try_all="--all" in sys.argv[1:])
     print("Done. Copy & paste the whole output here so I can analyze which encoding works.")
\ No newline at end of file
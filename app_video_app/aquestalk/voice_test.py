@@ -10,23 +10,83 @@
 
 import sys
 import os
-import io
-import wave
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import jaconv
 import aquestalk
 from aquestalk.aquestalk import AquesTalkError
 
+import _app_path  # puts app_video_app on sys.path for the shared helpers
+from aq_common import save_raw_wav_bytes
+
 DEFAULT_VOICES = ['f1','f2','f3','f4','f5','f6','f7','f8']
+SPEED = 100  # adjust speed as needed (e.g., 80..200)
+
+# Synthesized WAVs are kept here, keyed by voice/speed/text and the voice DLL's
+# path, mtime and size, so re-runs skip the DLL until the DLL itself changes.
+_CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), 'audc', 'voice_cache')
+
+def _dll_path(v):
+    # same path aquestalk.load() uses: aquestalk/<voice>/AquesTalk.dll
+    return os.path.join(os.path.dirname(os.path.abspath(aquestalk.__file__)), v, 'AquesTalk.dll')
+
+def _available_voices():
+    # voice names that have an AquesTalk.dll in the package
+    base = os.path.dirname(aquestalk.__file__)
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return set()
+    return {n for n in names if os.path.isfile(_dll_path(n))}
+
+def _cache_path(v, text):
+    # None when the DLL cannot be stat'ed: nothing to key on, so don't cache
+    dll = _dll_path(v)
+    try:
+        st = os.stat(dll)
+    except OSError:
+        return None
+    key = f"{v}|{SPEED}|{text}|{dll}|{st.st_mtime_ns}|{st.st_size}"
+    key = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(_CACHE_DIR, key + '.wav')
+
+_PRINT_LOCK = threading.Lock()
 
-def save_raw_wav_bytes(raw_bytes, out_path):
-    with wave.open(io.BytesIO(raw_bytes), 'rb') as r:
-        frames = r.readframes(r.getnframes())
-        with wave.open(out_path, 'wb') as wf:
-            wf.setnchannels(r.getnchannels())
-            wf.setsampwidth(r.getsampwidth())
-            wf.setframerate(r.getframerate())
-            wf.writeframes(frames)
+def _log(*args):
+    # main thread and writer thread both report; keep each line whole
+    with _PRINT_LOCK:
+        print(*args)
+
+def _write_one(v, raw, out_name, cache_path):
+    # AquesTalk returns a complete WAV with correct RIFF/data sizes, so it is
+    # written verbatim: there is no header to build or patch here
+    save_raw_wav_bytes(raw, out_name)
+    _log(f"-- Testing voice: {v} ... OK ->", out_name)
+    if cache_path is None:
+        return
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        shutil.copyfile(out_name, cache_path)
+    except OSError as e:
+        _log(f"-- cache write failed for {v}:", e)
+
+def _synth_voice(v, text):
+    # Runs in a worker process so every voice gets its own copy of the DLL.
+    # The whole text goes through one synthe call, so the WAV is exactly what
+    # the DLL returns. Returns (raw, None) or (None, (label, message)); errors go
+    # back as text because AquesTalkError(err) cannot be rebuilt from its pickled message.
+    try:
+        aq = aquestalk.load(v)  # may raise if voice not available
+        # You can change speed (SPEED) or other params if wrapper supports them
+        raw = aq.synthe_raw(text, speed=SPEED)
+        return raw, None
+    except AquesTalkError as ae:
+        return None, ("AquesTalkError:", str(ae))
+    except Exception as e:
+        return None, ("FAILED:", str(e))
 
 def main():
     if len(sys.argv) < 2:
@@ -46,22 +106,52 @@ def main():
     success = []
     failed = []
 
+    # one process per voice, so DLLs with process-global state don't contend;
+    # a single writer thread saves the WAVs while other voices still synthesize
+    results = {}
+    pending = []
+    # skip voices without a DLL up front instead of letting load() fail in a worker
+    available = _available_voices()
+    for v in voices:
+        if v not in available:
+            print(f"-- Testing voice: {v} ... skipped (no AquesTalk.dll)")
+            results[v] = (None, "no AquesTalk.dll", None)
+            continue
+        out_name = f"{out_prefix}_{v}.wav"
+        cache_path = _cache_path(v, text)
+        if cache_path is not None and os.path.exists(cache_path):
+            shutil.copyfile(cache_path, out_name)
+            print(f"-- Testing voice: {v} ... cached ->", out_name)
+            results[v] = (out_name, None, None)
+        else:
+            pending.append(v)
+
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        with ProcessPoolExecutor(max_workers=max(1, min(8, len(pending)))) as ex:
+            futs = [(v, ex.submit(_synth_voice, v, text)) for v in pending]
+            for v, f in futs:
+                try:
+                    raw, err = f.result()
+                except Exception as e:
+                    raw, err = None, ("FAILED:", str(e))
+                if err is not None:
+                    _log(f"-- Testing voice: {v} ...", *err)
+                    results[v] = (None, err[1], None)
+                    continue
+                out_name = f"{out_prefix}_{v}.wav"
+                fut = writer.submit(_write_one, v, raw, out_name, _cache_path(v, text))
+                results[v] = (out_name, None, fut)
+
     for v in voices:
-        try:
-            print(f"-- Testing voice: {v} ...", end=' ')
-            aq = aquestalk.load(v)  # may raise if voice not available
-            # You can change speed (e.g., 80..200) or other params if wrapper supports them
-            raw = aq.synthe_raw(text, speed=100)  # adjust speed as needed
-            out_name = f"{out_prefix}_{v}.wav"
-            save_raw_wav_bytes(raw, out_name)
-            print("OK ->", out_name)
+        out_name, err, fut = results[v]
+        if fut is not None:
+            err = fut.exception()
+            if err is not None:
+                print(f"-- Testing voice: {v} ... FAILED:", err)
+        if err is None:
             success.append(out_name)
-        except AquesTalkError as ae:
-            print("AquesTalkError:", ae)
-            failed.append((v, str(ae)))
-        except Exception as e:
-            print("FAILED:", e)
-            failed.append((v, str(e)))
+        else:
+            failed.append((v, str(err)))
 
     print("\nSummary:")
     print("Succeeded:", len(success))
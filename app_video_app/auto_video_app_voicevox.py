@@ -2,7 +2,8 @@
 # auto_video_app_voicevox.py
 # Main GUI application for Auto Video App
 # Full file (UI preserved) with CPU/GPU thread optimization integration.
-# - Reads AUTO_VIDEO_MAX_THREADS and AUTO_VIDEO_PREFER_GPU env vars (defaults: 24, 1)
+# - Thread cap comes from video_worker (AUTO_VIDEO_MAX_THREADS, default 24): clamped to
+#   physical cores, and to 2-4 only when a GPU encoder (NVENC/AMF/QSV) is detected
 # - Uses _MAX_THREADS to limit parallel rendering tasks in GUI
 # - Keeps LogManager and UI behavior from previous v19/v20 code
 # - When spawning render tasks, passes max_workers based on AUTO_VIDEO_MAX_THREADS
@@ -17,12 +18,94 @@ import subprocess
 import re
 import json
 import time
+import functools
+import types
+import concurrent.futures
+import queue
+import atexit
+import collections
+import itertools
 from datetime import datetime
 from pathlib import Path
 
-# Read environment tuning values (consistent with video_worker.py)
-AUTO_VIDEO_MAX_THREADS = max(1, int(os.environ.get("AUTO_VIDEO_MAX_THREADS", "24")))
-AUTO_VIDEO_PREFER_GPU = os.environ.get("AUTO_VIDEO_PREFER_GPU", "1") == "1"
+# Requested thread cap; the effective value is shared with video_worker (see below)
+_REQUESTED_MAX_THREADS = max(1, int(os.environ.get("AUTO_VIDEO_MAX_THREADS", "24")))
+# optional CPU pinning: unset/"0" = off, "auto" = physical cores, or a comma list of CPU ids
+# (any other number, "1" included, is read as that CPU id)
+AUTO_VIDEO_AFFINITY = os.environ.get("AUTO_VIDEO_AFFINITY", "").strip()
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+_AFFINITY_CPUS = []
+
+def _affinity_cpus():
+    spec = AUTO_VIDEO_AFFINITY.lower()
+    if not spec or spec == "0":
+        return []
+    if spec != "auto":
+        try:
+            return sorted({int(x) for x in spec.split(",") if x.strip()})
+        except ValueError:
+            return []
+    if psutil is None:
+        return []
+    try:
+        logical = sorted(psutil.Process().cpu_affinity())
+        phys = psutil.cpu_count(logical=False) or len(logical)
+    except Exception:
+        return []
+    # HT siblings are usually adjacent ids; keep one id per physical core
+    step = max(1, len(logical) // max(1, phys))
+    return logical[::step][:AUTO_VIDEO_MAX_THREADS]
+
+def _apply_affinity():
+    # pin the whole process once; threads inherit the set
+    global _AFFINITY_CPUS
+    cpus = _affinity_cpus()
+    if not cpus:
+        return []
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(cpus))
+        elif sys.platform == "win32":
+            import ctypes
+            k32 = ctypes.windll.kernel32
+            mask = 0
+            for c in cpus:
+                mask |= 1 << c
+            if not k32.SetProcessAffinityMask(k32.GetCurrentProcess(), mask):
+                return []
+        else:
+            return []
+    except Exception:
+        return []
+    _AFFINITY_CPUS = cpus
+    return cpus
+
+def set_thread_affinity(cpu_id: int):
+    # pin the calling thread only; no-op when pinning is disabled
+    if not _AFFINITY_CPUS:
+        return
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(threading.get_native_id(), {cpu_id})
+        elif sys.platform == "win32":
+            import ctypes
+            k32 = ctypes.windll.kernel32
+            k32.SetThreadAffinityMask(k32.GetCurrentThread(), 1 << cpu_id)
+    except Exception:
+        pass
+
+def _run_on_last_cpu(target):
+    # background probes run on the last pinned core, away from the Tk thread
+    def run():
+        if _AFFINITY_CPUS:
+            set_thread_affinity(_AFFINITY_CPUS[-1])
+        return target()
+    return run
 
 if sys.platform == "win32":
     SI = subprocess.STARTUPINFO()
@@ -35,30 +118,71 @@ if sys.platform == "win32":
 else:
     SI = None
     CREATE_NO_WINDOW = 0
+CFLAGS = CREATE_NO_WINDOW if sys.platform == "win32" else 0
+# piped, windowless child process; shared by every ffmpeg call made from the GUI
+_POPEN_KW = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=SI, creationflags=CFLAGS)
 
 import tkinter as tk
 import tkinter.simpledialog as simpledialog
 from tkinter import ttk, filedialog, colorchooser, messagebox
-from activation_manager import activate_key, check_key_status
-import requests
+from activation_manager import activate_key, check_key_status, close_session
 
-from video_worker import render_sentence_dialogue, normalize_path_for_ffmpeg
+from video_worker import render_sentence_dialogue, normalize_path_for_ffmpeg, get_voicevox_session, detect_best_encoder
+from video_worker import MAX_CPU_THREADS, get_max_threads
+
+# CPU-side cap (physical cores), known without probing the encoder; the per-run
+# cap from get_max_threads() also accounts for a detected GPU encoder
+AUTO_VIDEO_MAX_THREADS = MAX_CPU_THREADS
 
 APP_TITLE = "Auto Video Hội Thoại 2 Nhân Vật (A/B - Code by Vũ Đức)"
 
+_ICONS_ROOT = Path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons"))
+
 def _icons_root():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    return Path(os.path.join(base_dir, "icons"))
+    return _ICONS_ROOT
+
+@functools.lru_cache(maxsize=16)
+def _list_icon_chars_cached(side_dir: str):
+    # DirEntry.is_dir() comes from the readdir data, no stat per entry
+    try:
+        with os.scandir(side_dir) as it:
+            return tuple(sorted(e.name for e in it if e.is_dir()))
+    except (FileNotFoundError, NotADirectoryError):
+        return ()
 
 def _list_icon_chars(side_dir: Path):
-    if not side_dir.exists():
-        return []
-    return sorted([p.name for p in side_dir.iterdir() if p.is_dir()])
+    return list(_list_icon_chars_cached(str(side_dir)))
+
+# both character cards list the same fonts dir; scan it once
+@functools.lru_cache(maxsize=1)
+def _list_system_fonts():
+    font_dir = os.path.join(os.environ.get("WINDIR", "C:/Windows"), "Fonts")
+    try:
+        with os.scandir(font_dir) as it:
+            return tuple(sorted(e.name for e in it if e.name.lower().endswith((".ttf", ".ttc", ".otf"))))
+    except (FileNotFoundError, NotADirectoryError):
+        return ()
+
+# (dir, align, meta mtime, dir mtime) -> resolved icon config; the dir mtime
+# changes when frames are added or removed, so stale entries are never hit
+_ICON_CACHE = {}
 
 def _resolve_icon_char(side_root: Path, char_name: str, default_align: str):
     if not char_name:
         return None
     d = side_root / char_name
+    try:
+        mt = (d / "meta.json").stat().st_mtime
+    except OSError:
+        mt = 0.0
+    try:
+        dmt = d.stat().st_mtime
+    except OSError:
+        dmt = 0.0
+    key = (str(d), default_align, mt, dmt)
+    hit = _ICON_CACHE.get(key)
+    if hit is not None:
+        return hit
     meta = {
         "align": default_align,
         "offset": [40, 30] if default_align == "left" else [-40, 30],
@@ -79,11 +203,45 @@ def _resolve_icon_char(side_root: Path, char_name: str, default_align: str):
     base  = _exists(d / "base.png")
     talks = [p for p in [d / "talk_0.png", d / "talk_1.png"] if p.exists()]
     blinks= [p for p in [d / "blink_0.png", d / "blink_1.png"] if p.exists()]
-    return {"base": base, "talk": [str(x) for x in talks], "blink": [str(x) for x in blinks], "meta": meta}
+    res = {"base": base, "talk": [str(x) for x in talks], "blink": [str(x) for x in blinks], "meta": meta}
+    if len(_ICON_CACHE) > 64:
+        _ICON_CACHE.clear()
+    _ICON_CACHE[key] = res
+    return res
+
+_VALID_ROLES = frozenset(("A", "B"))
+# CSV rows parsed per asyncio.to_thread hop while feeding the render workers
+_CSV_BATCH_ROWS = 256
 
 KEY_FILE = os.path.expanduser("~/.auto_video_app_activation.key")
+# probed AquesTalk voice list, keyed on the voices folder and its mtime
+AQ_VOICE_CACHE_FILE = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "audc", "aquestalk_voices.json")
+
+def _load_aq_voice_cache(folder):
+    try:
+        mt = os.path.getmtime(folder)
+        with open(AQ_VOICE_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("dir") == folder and data.get("mtime") == mt and data.get("voices"):
+            return list(data["voices"])
+    except Exception:
+        pass
+    return None
+
+def _save_aq_voice_cache(folder, voices):
+    try:
+        os.makedirs(os.path.dirname(AQ_VOICE_CACHE_FILE), exist_ok=True)
+        tmp = AQ_VOICE_CACHE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dir": folder, "mtime": os.path.getmtime(folder), "voices": list(voices)}, f, ensure_ascii=False)
+        os.replace(tmp, AQ_VOICE_CACHE_FILE)
+    except Exception:
+        pass
+# in-memory copy of KEY_FILE; None = not read yet
+_CACHED_KEY = None
 
 def prompt_for_key(root):
+    global _CACHED_KEY
     for _ in range(3):
         key = simpledialog.askstring("Kích hoạt", "Nhập mã kích hoạt ứng dụng:", parent=root)
         if not key:
@@ -95,6 +253,7 @@ def prompt_for_key(root):
         except Exception as e:
             result = {"status": "fail", "message": f"Lỗi kết nối: {e}"}
         if result.get("status") == "ok":
+            _CACHED_KEY = key
             try:
                 with open(KEY_FILE, "w", encoding="utf-8") as f:
                     f.write(key)
@@ -106,26 +265,60 @@ def prompt_for_key(root):
             messagebox.showerror("Lỗi kích hoạt", result.get("message", "Không xác định."))
     return False
 
-def check_activation(root):
-    saved_key = ""
-    if os.path.exists(KEY_FILE):
+# last successful check_key_status result; activation is checked once per process
+_ACTIVATION_CACHE = None
+
+def _read_saved_key():
+    global _CACHED_KEY
+    if _CACHED_KEY is None:
         try:
-            with open(KEY_FILE, "r", encoding="utf-8") as f:
-                saved_key = f.read().strip()
-        except Exception:
-            saved_key = ""
-    if saved_key:
+            _CACHED_KEY = Path(KEY_FILE).read_text(encoding="utf-8").strip()
+        except (OSError, UnicodeDecodeError):
+            _CACHED_KEY = ""
+    return _CACHED_KEY
+
+def check_activation(root, on_done):
+    # on_done(ok) is called on the Tk thread; the network check runs in the
+    # background so the event loop (and splash) stays responsive meanwhile
+    if _ACTIVATION_CACHE is not None:
+        on_done(True)
+        return True
+    saved_key = _read_saved_key()
+    if not saved_key:
+        on_done(prompt_for_key(root))
+        return None
+
+    splash = tk.Toplevel(root)
+    splash.title("Kích hoạt")
+    splash.resizable(False, False)
+    ttk.Label(splash, text="Đang kiểm tra…", padding=20).pack()
+
+    def _apply_result(result):
+        global _ACTIVATION_CACHE, _CACHED_KEY
         try:
-            result = check_key_status(saved_key)
-        except Exception as e:
-            result = {"status": "fail", "message": f"Lỗi kết nối: {e}"}
+            splash.destroy()
+        except Exception:
+            pass
         if result.get("status") == "ok":
-            return True
+            _ACTIVATION_CACHE = result
+            on_done(True)
+            return
+        _CACHED_KEY = None
         try:
-            os.remove(KEY_FILE)
+            Path(KEY_FILE).unlink(missing_ok=True)
         except Exception:
             pass
-    return prompt_for_key(root)
+        on_done(prompt_for_key(root))
+
+    def _do_check():
+        try:
+            result = check_key_status(saved_key)
+        except Exception as e:
+            result = {"status": "fail", "message": f"Lỗi kết nối: {e}"}
+        root.after(0, lambda: _apply_result(result))
+
+    threading.Thread(target=_do_check, daemon=True).start()
+    return None
 
 class PaletteClassic:
     BG_APP   = "#f2f4f7"
@@ -138,6 +331,20 @@ class PaletteClassic:
     BTN_STEEL_ACTIVE = "#415764"
 
 # ----------------- LogManager (compact summarizer) ---------------------
+class SentenceState:
+    # what LogManager collected for one sentence idx
+    __slots__ = ("attempts", "errors", "final", "debug_files", "messages", "found_success")
+
+    def __init__(self):
+        self.attempts = []
+        # bounded: the summary only shows the last few errors, success is
+        # tracked in found_success, and idx -1 collects every unparsed line
+        self.errors = collections.deque(maxlen=32)
+        self.final = None
+        self.debug_files = {}  # insertion-ordered set
+        self.messages = collections.deque(maxlen=200)
+        self.found_success = False
+
 class LogManager:
     _AQT_SYNTH_ERROR_RE = re.compile(r'\[AquesTalk\] Synth error for idx=(\d+).*?(105|未定義|読み記号|未定義の読み)', re.IGNORECASE)
     _ALL_ATTEMPTS_FAILED_RE = re.compile(r'All attempts failed for idx=(\d+); debug input file:\s*(\S+)', re.IGNORECASE)
@@ -151,204 +358,321 @@ class LogManager:
     _SYNTH_START = re.compile(r'\[AquesTalk\] Synth start: voice=(\w+) idx=(\d+) attempt_order=(\d+)', re.IGNORECASE)
     _PRODUCED = re.compile(r'\[AquesTalk\] Synth produced\s*(\S+)')
     _REENCODE = re.compile(r'\[AquesTalk\] Re-encoded synth ->\s*(\S+)')
-
-    def __init__(self, text_widget, detailed_by_default=False):
+    _IDX_RE = re.compile(r'idx=(\d+)')
+    _SUCCESS_RE = re.compile(r'(=>\s*thành công|=>\s*OK\b|OK\s*\(wav|OK\s*\()', re.IGNORECASE)
+
+    # all line patterns fused into one alternation (named groups, same order as
+    # the handlers in handle_raw); IGNORECASE is kept per pattern
+    _DISPATCH = {
+        "aqt_err": _AQT_SYNTH_ERROR_RE,
+        "all_failed": _ALL_ATTEMPTS_FAILED_RE,
+        "vn_ok": _SENTENCE_RESULT_VN_OK,
+        "ok": _SENTENCE_RESULT_OK,
+        "vn_fail": _SENTENCE_RESULT_VN_FAIL,
+        "failed_render": _SENTENCE_FAILED_RENDER,
+        "synth_start": _SYNTH_START,
+        "clause_info": _AQT_CLAUSE_INFO,
+        "clause_exc": _AQT_CLAUSE_EXC,
+        "produced": _PRODUCED,
+        "reencode": _REENCODE,
+        "debug_md5": _DEBUG_MD5,
+    }
+    _COMBINED_RE = re.compile("|".join(
+        f"(?P<{name}>(?i:{pat.pattern}))" if pat.flags & re.IGNORECASE else f"(?P<{name}>{pat.pattern})"
+        for name, pat in _DISPATCH.items()))
+    # every pattern above (and _IDX_RE) needs one of these substrings in the
+    # lowercased line; plain lines skip the regex entirely
+    _MARKERS = ("[aquestalk", "câu", "[debug-extract]", "idx=")
+
+    def __init__(self, text_widget, detailed_by_default=False, listbox=False):
+        # text_widget is a tk.Text, or a tk.Listbox (one row per line) when listbox=True
         self.text_widget = text_widget
+        self._listbox = bool(listbox)
         self.compact = True
         self.raw_log_path = os.path.join(tempfile.gettempdir(), f"auto_video_app_rawlog_{int(time.time())}.log")
         self.per_sentence = {}
         self.global_warnings = set()
+        # handle_raw and the refresh run on the Tk thread, but clear() is called
+        # from the render loop thread, so per-sentence state, warnings and
+        # refresh state are all guarded by this one lock
         self._lock = threading.Lock()
+        # refreshes are coalesced: at most one pending after() at a time
+        self._pending_refresh = False
+        self._refresh_interval_ms = 50
+        # compact view is patched line by line: idx values touched since the last
+        # render, and what is currently shown (keys in order, text per idx, warn line)
+        self._summary_dirty_keys = set()
+        self._line_for_idx = {}
+        self._rendered_keys = None
+        self._rendered_gw = None
+        # raw log: one open file, written in batches by a daemon thread so
+        # handle_raw never waits on disk
+        self._raw_q = queue.Queue(maxsize=10000)
+        # last 500 raw lines for the detailed view (the file stays the full record)
+        self._tail = collections.deque(maxlen=500)
         try:
-            with open(self.raw_log_path, "a", encoding="utf-8") as f:
-                f.write(f"--- Raw log started at {datetime.utcnow().isoformat()}Z ---\n")
+            self._raw_fp = open(self.raw_log_path, "a", encoding="utf-8", buffering=1 << 16)
+            self._raw_fp.write(f"--- Raw log started at {datetime.utcnow().isoformat()}Z ---\n")
+            self._raw_fp.flush()
         except Exception:
-            pass
+            self._raw_fp = None
+        self._raw_thread = threading.Thread(target=self._raw_writer, name="rawlog-writer", daemon=True)
+        self._raw_thread.start()
+        atexit.register(self._close_raw)
+
+    def _raw_writer(self):
+        while True:
+            lines = [self._raw_q.get()]
+            try:
+                while True:
+                    lines.append(self._raw_q.get_nowait())
+            except queue.Empty:
+                pass
+            stop = None in lines
+            if stop:
+                lines = [ln for ln in lines if ln is not None]
+            if self._raw_fp is not None and lines:
+                try:
+                    self._raw_fp.write("\n".join(lines) + "\n")
+                    self._raw_fp.flush()
+                except Exception:
+                    pass
+            if stop:
+                return
 
-    def _save_raw(self, line: str):
+    def _close_raw(self):
+        # flush what is queued, then close the file
         try:
-            with open(self.raw_log_path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+            self._raw_q.put(None, timeout=1)
+            self._raw_thread.join(timeout=2)
         except Exception:
             pass
+        if self._raw_fp is not None:
+            try:
+                self._raw_fp.close()
+            except Exception:
+                pass
+            self._raw_fp = None
+
+    def _save_raw(self, line: str):
+        self._tail.append(line)
+        try:
+            self._raw_q.put_nowait(line)
+        except queue.Full:
+            pass  # never block the caller; drop the line
+
+    def _get(self, idx):
+        # per-sentence entry, created on first use; callers hold self._lock
+        s = self.per_sentence.get(idx)
+        if s is None:
+            s = self.per_sentence[idx] = SentenceState()
+        return s
+
+    def clear(self):
+        with self._lock:
+            self.per_sentence.clear()
+            self.global_warnings.clear()
+            self._summary_dirty_keys.clear()
+            self._rendered_keys = None
 
     def handle_raw(self, line: str):
         if not line:
             return
         self._save_raw(line)
-        parsed = False
+        # one pass over the line finds which pattern applies; that pattern is
+        # then matched at the same spot to get its groups (no lock needed)
+        low = line.lower()
+        if any(mk in low for mk in self._MARKERS):
+            hit = self._COMBINED_RE.search(line)
+        else:
+            hit = None
+        kind = hit.lastgroup if hit else None
+        m = self._DISPATCH[kind].match(line, hit.start()) if hit else None
+
+        if kind == "debug_md5":
+            with self._lock:
+                self.global_warnings.add(f"md5_match={m.group(1)}")
+            self._refresh_display()
+            return
+
+        if kind == "synth_start":
+            idx = int(m.group(2))
+        elif kind in ("clause_exc", "produced", "reencode", None):
+            idx_search = self._IDX_RE.search(line) if "idx=" in line else None
+            idx = int(idx_search.group(1)) if idx_search else None
+            if idx is None:
+                if kind == "clause_exc":
+                    with self._lock:
+                        self.global_warnings.add(f"clause_exc:{m.group(1)[:200]}")
+                elif kind is None:
+                    idx = -1
+        else:
+            idx = int(m.group(1))
+        if idx is None:
+            self._refresh_display()
+            return
+
         with self._lock:
-            m = self._AQT_SYNTH_ERROR_RE.search(line)
-            if m:
-                idx = int(m.group(1))
-                err_code = m.group(2)
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["errors"].append(f"AquesTalk_error:{err_code}")
-                s["messages"].append(line)
-                parsed = True
-
-            m = self._ALL_ATTEMPTS_FAILED_RE.search(line)
-            if m:
-                idx = int(m.group(1))
-                fn = m.group(2)
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["final"] = "thất bại(all attempts)"
-                s["debug_files"].add(fn)
-                s["messages"].append(line)
-                parsed = True
-
-            m = self._SENTENCE_RESULT_VN_OK.search(line) or self._SENTENCE_RESULT_OK.search(line)
-            if m:
-                idx = int(m.group(1))
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["final"] = "thành công"
-                s["messages"].append(line)
-                parsed = True
-
-            m = self._SENTENCE_RESULT_VN_FAIL.search(line)
-            if m:
-                idx = int(m.group(1))
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["final"] = "thất bại"
-                s["messages"].append(line)
-                parsed = True
-
-            m = self._SENTENCE_FAILED_RENDER.search(line)
-            if m:
-                idx = int(m.group(1))
-                err = m.group(2).strip()
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["final"] = f"thất bại({err})"
-                s["messages"].append(line)
-                parsed = True
-
-            m = self._SYNTH_START.search(line)
-            if m:
-                voice = m.group(1)
-                idx = int(m.group(2))
-                attempt = int(m.group(3))
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["attempts"].append({"attempt": attempt, "voice": voice, "raw": []})
-                s["messages"].append(line)
-                parsed = True
-
-            m = self._AQT_CLAUSE_INFO.search(line)
-            if m:
-                idx = int(m.group(1))
-                clause_info = f"clause {m.group(2)}/{m.group(3)} len={m.group(4)}"
-                s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                s["messages"].append(clause_info)
-                parsed = True
-
-            m = self._AQT_CLAUSE_EXC.search(line)
-            if m:
-                exc = m.group(1)
-                idx_search = re.search(r'idx=(\d+)', line)
-                if idx_search:
-                    idx = int(idx_search.group(1))
-                    s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                    s["errors"].append(f"clause_exc:{exc[:60]}")
-                    s["messages"].append(line)
-                else:
-                    self.global_warnings.add(f"clause_exc:{exc[:200]}")
-                parsed = True
-
-            m = self._PRODUCED.search(line)
-            if m:
-                fn = m.group(1)
-                idx_search = re.search(r'idx=(\d+)', line)
-                if idx_search:
-                    idx = int(idx_search.group(1))
-                    s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                    s["messages"].append(f"produced:{fn}")
-                parsed = True
-
-            m = self._REENCODE.search(line)
-            if m:
-                fn = m.group(1)
-                idx_search = re.search(r'idx=(\d+)', line)
-                if idx_search:
-                    idx = int(idx_search.group(1))
-                    s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                    s["messages"].append(f"reencoded:{fn}")
-                parsed = True
-
-            m = self._DEBUG_MD5.search(line)
-            if m:
-                val = m.group(1)
-                self.global_warnings.add(f"md5_match={val}")
-                parsed = True
-
-            if not parsed:
-                idx_search = re.search(r'idx=(\d+)', line)
-                if idx_search:
-                    idx = int(idx_search.group(1))
-                    s = self.per_sentence.setdefault(idx, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                    s["messages"].append(line)
-                else:
-                    s = self.per_sentence.setdefault(-1, {"attempts": [], "errors": [], "final": None, "debug_files": set(), "messages": []})
-                    s["messages"].append(line)
+            s = self._get(idx)
+            if kind == "aqt_err":
+                s.errors.append(f"AquesTalk_error:{m.group(2)}")
+                s.messages.append(line)
 
-        self._refresh_display()
+            elif kind == "all_failed":
+                s.final = "thất bại(all attempts)"
+                s.debug_files[m.group(2)] = None
+                s.messages.append(line)
+
+            elif kind in ("vn_ok", "ok"):
+                s.final = "thành công"
+                s.found_success = True
+                s.messages.append(line)
+
+            elif kind == "vn_fail":
+                s.final = "thất bại"
+                s.messages.append(line)
+
+            elif kind == "failed_render":
+                s.final = f"thất bại({m.group(2).strip()})"
+                s.messages.append(line)
+
+            elif kind == "synth_start":
+                s.attempts.append({"attempt": int(m.group(3)), "voice": m.group(1), "raw": []})
+                s.messages.append(line)
+
+            elif kind == "clause_info":
+                s.messages.append(f"clause {m.group(2)}/{m.group(3)} len={m.group(4)}")
+
+            elif kind == "clause_exc":
+                s.errors.append(f"clause_exc:{m.group(1)[:60]}")
+                s.messages.append(line)
+
+            elif kind == "produced":
+                s.messages.append(f"produced:{m.group(1)}")
+
+            elif kind == "reencode":
+                s.messages.append(f"reencoded:{m.group(1)}")
 
-    def _render_summary_lines(self):
-        lines = []
-        keys = sorted(k for k in self.per_sentence.keys() if k != -1)
-        for k in keys:
-            entry = self.per_sentence[k]
-            parts = []
-            parts.append(f"Câu {k+1 if k>=0 else k} (idx={k}):")
-            msgs_concat = "\n".join([m for m in entry.get("messages", []) if isinstance(m, str)])
-            found_success = False
-            if re.search(r'(=>\s*thành công|=>\s*OK\b|OK\s*\(wav|OK\s*\()', msgs_concat, re.IGNORECASE):
-                found_success = True
-
-            if found_success:
-                parts.append("thành công")
-            elif entry.get("final"):
-                parts.append(entry["final"])
             else:
-                if entry["errors"]:
-                    parts.append("errors=" + ",".join(entry["errors"][-3:]))
-                if entry["attempts"]:
-                    last = entry["attempts"][-1]
-                    vv = f"attempts={len(entry['attempts'])}"
-                    if last.get("voice"):
-                        vv += f",voice={last['voice']}"
-                    parts.append(vv)
-            if entry.get("debug_files"):
-                parts.append("debug_files=" + ",".join(sorted(entry["debug_files"])))
-            lines.append(" ".join(parts))
-        if self.global_warnings:
-            gw = "GLOBAL WARN: " + "; ".join(sorted(self.global_warnings))
+                s.messages.append(line)
+
+            # success is decided per message as it arrives, so rendering never
+            # has to rescan the whole message history
+            if not s.found_success and self._SUCCESS_RE.search(s.messages[-1]):
+                s.found_success = True
+
+        self._refresh_display(idx)
+
+    def _render_summary_lines(self):
+        lines = [self._render_summary_line(k) for k in sorted(k for k in self.per_sentence.keys() if k != -1)]
+        gw = self._render_global_warn()
+        if gw:
             lines.insert(0, gw)
         return lines
 
-    def _refresh_display(self):
+    def _render_global_warn(self):
+        if self.global_warnings:
+            return "GLOBAL WARN: " + "; ".join(sorted(self.global_warnings))
+        return None
+
+    def _render_summary_line(self, k):
+        # callers hold self._lock
+        return self._format_summary_line(k, self.per_sentence[k])
+
+    def _format_summary_line(self, k, entry):
+        parts = []
+        parts.append(f"Câu {k+1 if k>=0 else k} (idx={k}):")
+        if entry.found_success:
+            parts.append("thành công")
+        elif entry.final:
+            parts.append(entry.final)
+        else:
+            if entry.errors:
+                parts.append("errors=" + ",".join(list(entry.errors)[-3:]))
+            if entry.attempts:
+                last = entry.attempts[-1]
+                vv = f"attempts={len(entry.attempts)}"
+                if last.get("voice"):
+                    vv += f",voice={last['voice']}"
+                parts.append(vv)
+        if entry.debug_files:
+            parts.append("debug_files=" + ",".join(entry.debug_files))
+        return " ".join(parts)
+
+    def _refresh_display(self, idx=None):
+        # many log lines in a burst -> one render after _refresh_interval_ms;
+        # idx is the sentence just updated, marked for the next compact patch
+        with self._lock:
+            if idx is not None:
+                self._summary_dirty_keys.add(idx)
+            if self._pending_refresh:
+                return
+            self._pending_refresh = True
         try:
-            def _do():
-                self.text_widget.config(state="normal")
-                self.text_widget.delete("1.0", "end")
+            self.text_widget.after(self._refresh_interval_ms, self._do_refresh)
+        except Exception:
+            self._do_refresh()
+
+    def _do_refresh(self):
+        try:
+            with self._lock:
+                self._pending_refresh = False
+                dirty, self._summary_dirty_keys = self._summary_dirty_keys, set()
+                updates = None
                 if self.compact:
-                    for ln in self._render_summary_lines():
-                        self.text_widget.insert("end", ln + "\n")
+                    keys = sorted(k for k in self.per_sentence.keys() if k != -1)
+                    gw = self._render_global_warn()
+                    if keys == self._rendered_keys and gw == self._rendered_gw:
+                        # same rows as on screen: only rewrite the rows that changed
+                        updates = []
+                        first = 2 if gw else 1
+                        for pos, k in enumerate(keys):
+                            if k in dirty:
+                                ln = self._render_summary_line(k)
+                                if self._line_for_idx.get(k) != ln:
+                                    self._line_for_idx[k] = ln
+                                    updates.append((first + pos, ln))
+                    else:
+                        self._line_for_idx = {k: self._render_summary_line(k) for k in keys}
+                        lines = [self._line_for_idx[k] for k in keys]
+                        if gw:
+                            lines.insert(0, gw)
+                        self._rendered_keys = keys
+                        self._rendered_gw = gw
                 else:
-                    try:
-                        with open(self.raw_log_path, "r", encoding="utf-8") as f:
-                            alltxt = f.read().strip().splitlines()
-                        tail = alltxt[-500:]
-                        for ln in tail:
-                            self.text_widget.insert("end", ln + "\n")
-                    except Exception:
-                        for k in sorted(self.per_sentence.keys()):
-                            for m in self.per_sentence[k]["messages"][-10:]:
-                                self.text_widget.insert("end", (m[:800] if isinstance(m, str) else str(m)) + "\n")
-                self.text_widget.see("end")
+                    self._rendered_keys = None
+                    lines = None
+            if updates is not None:
+                if not updates:
+                    return
+                if self._listbox:
+                    for ln_no, ln in updates:
+                        self.text_widget.delete(ln_no - 1)
+                        self.text_widget.insert(ln_no - 1, ln)
+                    return
+                self.text_widget.config(state="normal")
+                for ln_no, ln in updates:
+                    self.text_widget.delete(f"{ln_no}.0", f"{ln_no}.end")
+                    self.text_widget.insert(f"{ln_no}.0", ln)
                 self.text_widget.config(state="disabled")
-            try:
-                self.text_widget.after(1, _do)
-            except Exception:
-                _do()
+                return
+            if lines is None:
+                lines = list(self._tail)
+            if self._listbox:
+                self.text_widget.delete(0, "end")
+                if lines:
+                    # one row per line: multi-line messages (tracebacks, ffmpeg
+                    # stderr) would otherwise be squashed into a single row
+                    self.text_widget.insert("end", *(row for ln in lines for row in ln.split("\n")))
+                self.text_widget.see("end")
+                return
+            self.text_widget.config(state="normal")
+            self.text_widget.delete("1.0", "end")
+            # one insert for the whole view; per-line inserts re-index the widget each time
+            if lines:
+                self.text_widget.insert("end", "\n".join(lines) + "\n")
+            self.text_widget.see("end")
+            self.text_widget.config(state="disabled")
         except Exception:
             pass
 
@@ -374,6 +698,7 @@ class LogManager:
 
 class AutoVideoApp:
     def __init__(self, root: tk.Tk):
+        _apply_affinity()
         self.root = root
         self.root.title(APP_TITLE)
         self.root.geometry("1200x780")
@@ -401,6 +726,7 @@ class AutoVideoApp:
         self.output_name = tk.StringVar(value="video_hoithoai.mp4")
         self.output_dir = os.path.expanduser("~/Downloads")
         self.voicevox_speakers = []
+        self._vv_by_name = {}
         self.edge_tts_speakers = [{"name": "en-US-JennyNeural", "id": "en-US-JennyNeural"}]
         self.image_paths = []
         self.csv_path = ""
@@ -415,11 +741,20 @@ class AutoVideoApp:
         self.right_panel.pack(side="right", fill="both", padx=(12, 0))
         self.log_group = ttk.LabelFrame(self.right_panel, text="Bảng log chi tiết / tóm tắt")
         self.log_group.pack(fill="both", expand=True)
-        self.log_text = tk.Text(self.log_group, bg="white", state="disabled")
+        # a Listbox only keeps one string per row, so redraws stay cheap on long runs;
+        # rows don't wrap, so long lines are read with the horizontal scrollbar
+        log_sb = tk.Scrollbar(self.log_group, orient="vertical")
+        log_xsb = tk.Scrollbar(self.log_group, orient="horizontal")
+        self.log_text = tk.Listbox(self.log_group, bg="white", width=80, activestyle="none",
+                                   yscrollcommand=log_sb.set, xscrollcommand=log_xsb.set)
+        log_sb.config(command=self.log_text.yview)
+        log_xsb.config(command=self.log_text.xview)
+        log_sb.pack(side="right", fill="y")
+        log_xsb.pack(side="bottom", fill="x")
         self.log_text.pack(fill="both", expand=True)
 
         # Initialize LogManager
-        self.log_manager = LogManager(self.log_text, detailed_by_default=False)
+        self.log_manager = LogManager(self.log_text, detailed_by_default=False, listbox=True)
         # Control row for compact/detailed and export
         c_row = ttk.Frame(self.right_panel)
         c_row.pack(fill="x", pady=(4, 6))
@@ -432,7 +767,21 @@ class AutoVideoApp:
         # re-entrancy guard + run id
         self._running = False
         self._run_id = 0
+        # the thread-cap info line is logged on the first run only
+        self._thread_cap_logged = False
         self.create_btn = None  # will be set in build_action_row
+        # render workers only post here; _drain_progress applies it on the Tk thread
+        self._progress_pending = None
+        # runs are coroutines on one long-lived event loop (own daemon thread)
+        # instead of a fresh asyncio.run() per click
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="render-loop", daemon=True)
+        self._loop_thread.start()
+        self._run_future = None
+        # add_log only appends here (from any thread); _flush_log hands the lines
+        # to the LogManager on the Tk thread in batches
+        self._log_queue = collections.deque()
+        self.root.after(150, self._flush_log)
 
         self.build_input_card(self.left_panel, P)
         self.build_character_card(self.left_panel, "A", P)
@@ -441,8 +790,8 @@ class AutoVideoApp:
         self.build_action_row(self.left_panel)
         self.status = ttk.Label(self.left_panel, text="Sẵn sàng…", style="Muted.TLabel")
         self.status.pack(fill="x", pady=(4, 0))
-        threading.Thread(target=self.load_voicevox_speakers, daemon=True).start()
-        threading.Thread(target=self.probe_and_merge_aquestalk_voices, daemon=True).start()
+        threading.Thread(target=_run_on_last_cpu(self.load_voicevox_speakers), daemon=True).start()
+        threading.Thread(target=_run_on_last_cpu(self.probe_and_merge_aquestalk_voices), daemon=True).start()
 
     # (UI builder methods omitted here for brevity — unchanged from your version)
     def build_card(self, parent, title, P):
@@ -517,10 +866,9 @@ class AutoVideoApp:
             row=1, column=3, sticky="w", padx=6, pady=6
         )
         ttk.Label(row, text="Font:", background=P.FRAME_BG).grid(row=2, column=2, sticky="w", padx=6, pady=6)
-        font_dir = os.path.join(os.environ.get("WINDIR", "C:/Windows"), "Fonts")
-        font_list = [f for f in os.listdir(font_dir) if f.lower().endswith((".ttf", ".ttc", ".otf"))] if os.path.isdir(font_dir) else []
+        font_list = list(_list_system_fonts())
         setattr(self, f"font_option_{prefix}",
-                ttk.Combobox(row, values=sorted(font_list) or ["Arial.ttf"], state="readonly", width=28))
+                ttk.Combobox(row, values=font_list or ["Arial.ttf"], state="readonly", width=28))
         getattr(self, f"font_option_{prefix}").set(
             "YuGothB.ttc" if "YuGothB.ttc" in font_list else (font_list[0] if font_list else "Arial.ttf")
         )
@@ -652,16 +1000,21 @@ class AutoVideoApp:
 
     # Replaced add_log: route through LogManager
     def add_log(self, s: str):
-        try:
-            self.log_manager.handle_raw(s)
-        except Exception:
+        self._log_queue.append(s)
+
+    def _flush_log(self):
+        q = self._log_queue
+        for _ in range(min(len(q), 1000)):
+            s = q.popleft()
             try:
-                self.log_text.config(state="normal")
-                self.log_text.insert("end", s + "\n")
-                self.log_text.see("end")
-                self.log_text.config(state="disabled")
+                self.log_manager.handle_raw(s)
             except Exception:
-                pass
+                try:
+                    self.log_text.insert("end", *s.split("\n"))
+                    self.log_text.see("end")
+                except Exception:
+                    pass
+        self.root.after(150, self._flush_log)
 
     def _export_summary(self):
         p = filedialog.asksaveasfilename(title="Lưu tóm tắt log", defaultextension=".txt", filetypes=[("Text", "*.txt")])
@@ -688,7 +1041,7 @@ class AutoVideoApp:
 
     def load_voicevox_speakers(self):
         try:
-            r = requests.get("http://127.0.0.1:50021/speakers", timeout=3)
+            r = get_voicevox_session().get("http://127.0.0.1:50021/speakers", timeout=3)
             if r.status_code == 200:
                 data = r.json()
                 lst = []
@@ -696,6 +1049,8 @@ class AutoVideoApp:
                     name = sp.get("name", "")
                     for s in sp.get("styles", []):
                         lst.append({"name": f"{name} ({s.get('name','')})", "id": int(s.get("id", 0))})
+                # first style wins on duplicate names, as the old linear scan did
+                self._vv_by_name = {v["name"]: v["id"] for v in reversed(lst)}
                 self.voicevox_speakers = lst
                 self.refresh_voice_list("A")
                 self.refresh_voice_list("B")
@@ -715,30 +1070,41 @@ class AutoVideoApp:
         if not os.path.isdir(candidate_dir):
             candidate_dir = os.path.join(base, "aquestalk")
         self.add_log(f"[AquesTalk] Probe folder: {candidate_dir}")
+        cached = None
         if os.path.isdir(candidate_dir):
+            # the DLL dir is needed for synthesis later, so it is added even on a cache hit
             try:
-                try:
-                    os.add_dll_directory(candidate_dir)
-                except Exception:
-                    os.environ["PATH"] = candidate_dir + os.pathsep + os.environ.get("PATH", "")
-                subs = sorted([d for d in os.listdir(candidate_dir) if os.path.isdir(os.path.join(candidate_dir, d))])
+                os.add_dll_directory(candidate_dir)
+            except Exception:
+                os.environ["PATH"] = candidate_dir + os.pathsep + os.environ.get("PATH", "")
+            cached = _load_aq_voice_cache(candidate_dir)
+        if cached:
+            avail = cached
+            self.add_log(f"[AquesTalk] cached voices: {', '.join(avail)}")
+        elif os.path.isdir(candidate_dir):
+            try:
+                with os.scandir(candidate_dir) as it:
+                    subs = sorted(e.name for e in it if e.is_dir())
                 self.add_log("[AquesTalk] Subfolders: " + ", ".join(subs[:50]))
                 for s in subs:
                     if s and (s[0].lower() in ("f","m","r","j") or s.isalnum()):
                         avail.append(s)
             except Exception as e:
                 self.add_log(f"[AquesTalk] list subfolders error: {e}")
-        try:
-            from synth_aquestalk import list_aquestalk_voices
+        if not cached:
             try:
-                probe = list_aquestalk_voices(try_short_test=False)
-                if probe:
-                    avail = probe
-                    self.add_log(f"[AquesTalk] synth_aquestalk probe returned: {', '.join(avail)}")
-            except Exception as e:
-                self.add_log(f"[AquesTalk] synth_aquestalk probe error: {e}")
-        except Exception:
-            pass
+                from synth_aquestalk import list_aquestalk_voices
+                try:
+                    probe = list_aquestalk_voices(try_short_test=False)
+                    if probe:
+                        avail = probe
+                        self.add_log(f"[AquesTalk] synth_aquestalk probe returned: {', '.join(avail)}")
+                except Exception as e:
+                    self.add_log(f"[AquesTalk] synth_aquestalk probe error: {e}")
+            except Exception:
+                pass
+            if avail and os.path.isdir(candidate_dir):
+                _save_aq_voice_cache(candidate_dir, avail)
 
         aq_tagged = [f"[AquesTalk] {v}" for v in avail] if avail else []
         def update_ui():
@@ -798,23 +1164,58 @@ class AutoVideoApp:
             except Exception:
                 pass
 
+    _TEMP_PREFIXES = ("line_", "subtitle_", "temp_", "dialogue_", "concat_", "pad_", "line_pad_")
+
     def clean_temp(self):
-        temp = tempfile.gettempdir()
-        removed = 0
-        for fn in os.listdir(temp):
-            if fn.startswith(("line_", "subtitle_", "temp_", "dialogue_", "concat_", "pad_", "line_pad_")):
-                try:
-                    os.remove(os.path.join(temp, fn))
-                    removed += 1
-                except Exception:
-                    pass
-        messagebox.showinfo("Dọn", f"Đã xóa {removed} file tạm.") 
+        # deletes run on a background thread (a few in parallel); the count is
+        # reported back on the Tk thread
+        def _unlink(path):
+            try:
+                os.unlink(path)
+                return True
+            except Exception:
+                return False
+
+        def _work():
+            temp = tempfile.gettempdir()
+            try:
+                with os.scandir(temp) as it:
+                    paths = [e.path for e in it if e.name.startswith(self._TEMP_PREFIXES)]
+            except Exception:
+                paths = []
+            removed = 0
+            if paths:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=8) as ex:
+                    removed = sum(ex.map(_unlink, paths))
+            self.root.after(0, lambda: messagebox.showinfo("Dọn", f"Đã xóa {removed} file tạm."))
+
+        threading.Thread(target=_work, daemon=True).start()
 
     def on_create(self):
         if getattr(self, "_running", False):
             messagebox.showinfo("Đang chạy", "Đang có tiến trình tạo video. Vui lòng đợi hoàn tất hoặc hủy trước khi bắt đầu lần nữa.")
             return
-        threading.Thread(target=lambda: asyncio.run(self.create_video_dialogue()), daemon=True).start()
+        self._run_future = asyncio.run_coroutine_threadsafe(self.create_video_dialogue(), self._loop)
+        self.root.after(100, self._drain_progress)
+
+    def close_loop(self):
+        try:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        except Exception:
+            pass
+
+    def _drain_progress(self):
+        # runs on the Tk thread at most 10x/s while a run is active and applies
+        # the latest progress value
+        f = self._run_future
+        alive = f is not None and not f.done()
+        pct = self._progress_pending
+        if pct is not None:
+            self._progress_pending = None
+            self.progress.configure(value=pct)
+            self.status.configure(text=f"Đang xử lý… {pct}%", foreground="blue")
+        if alive:
+            self.root.after(100, self._drain_progress)
 
     async def create_video_dialogue(self):
         if getattr(self, "_running", False):
@@ -822,6 +1223,7 @@ class AutoVideoApp:
         self._running = True
         self._run_id += 1
         run_id = self._run_id
+        csv_f = None
         try:
             try:
                 if self.create_btn:
@@ -836,16 +1238,29 @@ class AutoVideoApp:
             if not self.image_paths:
                 messagebox.showerror("Lỗi", "Vui lòng chọn ít nhất một ảnh/video nền.")
                 return
-            lines = []
-            with open(self.csv_path, encoding="utf-8") as f:
-                reader = csv.reader(f)
-                for row in reader:
+            # rows are parsed lazily and fed to the render workers as they go;
+            # only the first one is read up front to validate the file
+            csv_f = open(self.csv_path, encoding="utf-8", newline="", buffering=1 << 20)
+
+            def iter_lines():
+                idx = 0
+                for row in csv.reader(csv_f):
                     if len(row) >= 2:
                         role = row[0].strip().upper()
-                        text = ",".join(row[1:]).strip()
-                        if role in ("A", "B") and text:
-                            lines.append({"role": role, "text": text})
-            if not lines:
+                        if role not in _VALID_ROLES:
+                            continue
+                        # unquoted commas split the sentence into extra fields; the
+                        # usual two-column row needs no re-join
+                        text = (row[1] if len(row) == 2 else ",".join(row[1:])).strip()
+                        if text:
+                            yield idx, {"role": role, "text": text}
+                            idx += 1
+
+            line_iter = iter_lines()
+            # CSV reads (this first row, then the batches in produce()) and the other
+            # setup disk I/O below run off the event loop
+            first_line = await asyncio.to_thread(next, line_iter, None)
+            if first_line is None:
                 messagebox.showerror("Lỗi", "CSV không hợp lệ (cột 1=A/B, cột 2=câu).")
                 return
             icons_root = _icons_root()
@@ -853,112 +1268,180 @@ class AutoVideoApp:
             B_name = getattr(self, "icon_char_B", tk.StringVar(value="(không có)")).get()
             A_icon_dir = str(icons_root / "A" / (A_name if A_name != "(không có)" else "1"))
             B_icon_dir = str(icons_root / "B" / (B_name if B_name != "(không có)" else "1"))
-            A_cfg = _resolve_icon_char(icons_root / "A", A_name if A_name != "(không có)" else None, "left")
-            B_cfg = _resolve_icon_char(icons_root / "B", B_name if B_name != "(không có)" else None, "right")
-            icons_cfg = {"A": A_cfg, "B": B_cfg}
+            A_cfg = await asyncio.to_thread(_resolve_icon_char, icons_root / "A", A_name if A_name != "(không có)" else None, "left")
+            B_cfg = await asyncio.to_thread(_resolve_icon_char, icons_root / "B", B_name if B_name != "(không có)" else None, "right")
+            # A_cfg/B_cfg are the shared _ICON_CACHE entries, so hand them on read-only
+            icons_cfg = types.MappingProxyType({"A": A_cfg, "B": B_cfg})
+            # Use the shared thread cap to determine parallelism. Each job is
+            # itself a multi-threaded ffmpeg, so the cores are split between jobs;
+            # NVENC sessions are capped by the driver, so only two run at once.
+            encoder = await asyncio.to_thread(detect_best_encoder)
+            max_threads = get_max_threads()
+            max_workers = max(1, min(max_threads, max(2, (os.cpu_count() or 4))))
+            if encoder == "h264_nvenc":
+                max_workers = min(2, max_workers)
+            ffmpeg_threads = max(1, (os.cpu_count() or 4) // max_workers)
+
+            # built once per run; each side's config is read-only and shared by
+            # every sentence of that role
             configs = {}
+            font_dir = os.path.join(os.environ.get("WINDIR", "C:/Windows"), "Fonts")
+            video_effect = self.video_effect_var.get()
+            encoder_preset = self.encoder_preset_var.get()
+            effect = self.effect_var.get()
             for prefix in ["A", "B"]:
-                voice_choice = getattr(self, f"voice_option_{prefix}").get()
+                def g(attr, default=None, _p=prefix):
+                    return getattr(self, f"{attr}_{_p}", default)
+
+                voice_choice = g("voice_option").get()
                 voice_source = "Voicevox"
                 speaker = None
                 if isinstance(voice_choice, str) and voice_choice.startswith("[AquesTalk]"):
                     voice_source = "AquesTalk"
                     speaker = voice_choice.replace("[AquesTalk] ", "").strip()
                 else:
-                    vlist = self.voicevox_speakers or []
-                    speaker = next((s['id'] for s in vlist if s['name'] == voice_choice), None)
-                font_dir = os.path.join(os.environ.get("WINDIR", "C:/Windows"), "Fonts")
-                font_path = os.path.join(font_dir, getattr(self, f"font_option_{prefix}").get())
+                    speaker = self._vv_by_name.get(voice_choice)
+                font_path = os.path.join(font_dir, g("font_option").get())
                 try:
-                    font_size_val = int(getattr(self, f"font_size_{prefix}").get())
+                    font_size_val = int(g("font_size").get())
                 except Exception:
                     font_size_val = 40
+                bg_opacity = g("bg_opacity")
+                stroke_size = g("stroke_size")
+                full_width = g("subtitle_full_width")
 
-                configs[prefix] = {
+                configs[prefix] = types.MappingProxyType({
                     "voice_source": voice_source,
-                    "pause_sec": float(getattr(self, f"pause_sec_{prefix}").get()),
-                    "video_effect": self.video_effect_var.get(),
+                    "pause_sec": float(g("pause_sec").get()),
+                    "video_effect": video_effect,
                     "speaker_id": speaker,
-                    "voice_speed": float(getattr(self, f"voice_speed_{prefix}").get()),
+                    "voice_speed": float(g("voice_speed").get()),
                     "font_path": font_path,
                     "font_size": font_size_val,
-                    "volume": int(getattr(self, f"volume_entry_{prefix}").get()),
-                    "bg_opacity": int(getattr(self, f"bg_opacity_{prefix}").get()) if hasattr(self, f"bg_opacity_{prefix}") else 200,
-                    "subtitle_color": getattr(self, f"subtitle_color_{prefix}") if hasattr(self, f"subtitle_color_{prefix}") else "#FFFFFF",
-                    "stroke_color": getattr(self, f"stroke_color_{prefix}") if hasattr(self, f"stroke_color_{prefix}") else "#000000",
-                    "stroke_size": int(getattr(self, f"stroke_size_{prefix}").get()) if hasattr(self, f"stroke_size_{prefix}") else 2,
-                    "bg_color": getattr(self, f"bg_color_{prefix}") if hasattr(self, f"bg_color_{prefix}") else "#000000",
-                    "encoder_preset": self.encoder_preset_var.get(),
+                    "volume": int(g("volume_entry").get()),
+                    "bg_opacity": int(bg_opacity.get()) if bg_opacity is not None else 200,
+                    "subtitle_color": g("subtitle_color", "#FFFFFF"),
+                    "stroke_color": g("stroke_color", "#000000"),
+                    "stroke_size": int(stroke_size.get()) if stroke_size is not None else 2,
+                    "bg_color": g("bg_color", "#000000"),
+                    "encoder_preset": encoder_preset,
                     "icons": icons_cfg,
                     "speak_role": prefix,
                     "icon_a_dir": A_icon_dir,
                     "icon_b_dir": B_icon_dir,
-                    "subtitle_full_width": getattr(self, f"subtitle_full_width_{prefix}").get() if hasattr(self, f"subtitle_full_width_{prefix}") else False,
-                    "effect": self.effect_var.get(),
+                    "subtitle_full_width": full_width.get() if full_width is not None else False,
+                    "effect": effect,
                     # keep clause-based default for AquesTalk to enable splitting into vế
                     "force_clause": True,
                     # AquesTalk per-text retries and conservative flags
                     "aquestalk_try_other_voices": False,
                     "aquestalk_aggressive_retry": False,
-                    "aquestalk_per_text_retries": 2
-                }
-            with self.log_manager._lock:
-                self.log_manager.per_sentence.clear()
-                self.log_manager.global_warnings.clear()
-            self.log_text.config(state="normal")
-            self.log_text.delete("1.0", "end")
-            self.log_text.config(state="disabled")
-            total = len(lines)
+                    "aquestalk_per_text_retries": 2,
+                    "ffmpeg_threads": ffmpeg_threads
+                })
+            self.log_manager.clear()
+            self.log_text.delete(0, "end")
+            if max_threads != _REQUESTED_MAX_THREADS and not self._thread_cap_logged:
+                # expected clamping (physical cores / GPU encoder), reported once as info
+                self._thread_cap_logged = True
+                self.add_log(f"[Info] max_threads={max_threads} (requested {_REQUESTED_MAX_THREADS}, encoder={encoder})")
+            # the row count is only known once the reader finishes; until then it is
+            # extrapolated from the bytes read so far against the file size
+            csv_size = os.fstat(csv_f.fileno()).st_size
+
+            def estimate_total(n):
+                return max(n, n * csv_size // max(1, csv_f.buffer.tell()))
+
+            total = estimate_total(1)
             done = 0
             self.progress['value'] = 0
             self.progress['maximum'] = 100
             temp_dir = tempfile.gettempdir()
-            video_paths = []
-            # Use AUTO_VIDEO_MAX_THREADS to determine parallelism (cap)
-            max_workers = max(1, min(AUTO_VIDEO_MAX_THREADS, max(2, (os.cpu_count() or 4))))
-            self.add_log(f"[RUN {run_id}] Sử dụng tối đa {max_workers} luồng FFmpeg/Voicevox… (AUTO_VIDEO_MAX_THREADS={AUTO_VIDEO_MAX_THREADS})")
+            # row index -> segment path, filled in by whichever worker finishes that row
+            video_paths = {}
+            self.add_log(f"[RUN {run_id}] Sử dụng tối đa {max_workers} luồng FFmpeg/Voicevox… (AUTO_VIDEO_MAX_THREADS={max_threads}, encoder={encoder}, ffmpeg -threads={ffmpeg_threads})")
 
-            sem = asyncio.Semaphore(max_workers)
+            line_q = asyncio.Queue(maxsize=max_workers * 2)
 
             def add_log_run(s: str):
-                try:
-                    self.add_log(f"[RUN {run_id}] {s}")
-                except Exception:
-                    try:
-                        self.add_log(s)
-                    except Exception:
-                        pass
+                self.add_log(f"[RUN {run_id}] {s}")
 
             async def process_one(idx, line):
-                async with sem:
-                    out_path = os.path.join(temp_dir, f"dialogue_{idx}.mp4")
-                    try:
-                        await render_sentence_dialogue(
-                            index=idx,
-                            sentence=line["text"],
-                            config=configs[line["role"]],
-                            image_paths=self.image_paths,
-                            output_path=out_path,
-                            add_log=add_log_run
-                        )
-                        if os.path.exists(out_path) and os.path.getsize(out_path) > 1024:
-                            video_paths.append((idx, out_path))
-                            self.add_log(f"[RUN {run_id}] Xử lý câu {idx+1} => thành công")
-                        else:
-                            self.add_log(f"[RUN {run_id}] Xử lý câu {idx+1} => thất bại (no output)")
-                        nonlocal done
-                        done += 1
-                        pct = int(done * 100 / max(1, total))
-                        self.progress['value'] = pct
-                        self.status.config(text=f"Đang xử lý… {pct}%", foreground="blue")
-                        self.root.update_idletasks()
-                    except Exception as e:
-                        self.add_log(f"[RUN {run_id}] Xử lý câu {idx+1} lỗi: {e}")
-
-            tasks = [process_one(idx, line) for idx, line in enumerate(lines)]
-            await asyncio.gather(*tasks)
+                out_path = os.path.join(temp_dir, f"dialogue_{idx}.mp4")
+                try:
+                    await render_sentence_dialogue(
+                        index=idx,
+                        sentence=line["text"],
+                        config=configs[line["role"]],
+                        image_paths=self.image_paths,
+                        output_path=out_path,
+                        add_log=add_log_run
+                    )
+                    if os.path.exists(out_path) and os.path.getsize(out_path) > 1024:
+                        video_paths[idx] = out_path
+                        add_log_run(f"Xử lý câu {idx+1} => thành công")
+                    else:
+                        add_log_run(f"Xử lý câu {idx+1} => thất bại (no output)")
+                    nonlocal done
+                    done += 1
+                    self._progress_pending = min(100, int(done * 100 / max(1, total)))
+                except asyncio.CancelledError:
+                    # log, but let the cancellation stop this worker
+                    add_log_run(f"Xử lý câu {idx+1} đã hủy")
+                    raise
+                except Exception as e:
+                    add_log_run(f"Xử lý câu {idx+1} lỗi: {e}")
+
+            async def produce():
+                nonlocal total
+                n = 0
+                try:
+                    await line_q.put(first_line)
+                    n = 1
+                    while True:
+                        # the rest of the file is parsed in batches off the event loop
+                        batch = await asyncio.to_thread(list, itertools.islice(line_iter, _CSV_BATCH_ROWS))
+                        if not batch:
+                            break
+                        total = estimate_total(n + len(batch))
+                        for item in batch:
+                            await line_q.put(item)
+                            n += 1
+                finally:
+                    total = max(1, n)
+                # end of the CSV: one stop marker per worker
+                for _ in range(max_workers):
+                    await line_q.put(None)
+
+            async def worker():
+                while True:
+                    item = await line_q.get()
+                    if item is None:
+                        return
+                    await process_one(*item)
+
+            workers = [asyncio.create_task(worker()) for _ in range(max_workers)]
+            try:
+                await produce()
+            except BaseException as e:
+                # the CSV broke part-way (or the run was cancelled): stop the workers
+                # before the run is released, so a new run cannot race them on the
+                # same dialogue_{idx}.mp4 files
+                for t in workers:
+                    t.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if not isinstance(e, Exception):
+                    raise
+                self._progress_pending = None
+                self.add_log(f"[RUN {run_id}] [CSV] lỗi đọc file: {e}")
+                messagebox.showerror("Lỗi", f"Lỗi đọc CSV: {e}")
+                self.status.config(text="Thất bại", foreground="red")
+                return
+            await asyncio.gather(*workers)
+            # the final status below is written directly; drop any unapplied %
+            self._progress_pending = None
             concat_list_file_path = os.path.join(temp_dir, "concat_dialogue.txt")
-            sorted_videos = [p for _, p in sorted(video_paths, key=lambda t: t[0])]
+            sorted_videos = [video_paths[i] for i in sorted(video_paths)]
             if not sorted_videos:
                 messagebox.showerror("Lỗi", "Không có file đoạn video tạo được. Kiểm tra log.")
                 self.status.config(text="Thất bại", foreground="red")
@@ -968,9 +1451,10 @@ class AutoVideoApp:
                     self.add_log(f"[RUN {run_id}] [Concat] Missing or invalid intermediate file: {p}")
                     messagebox.showerror("Lỗi", f"Missing or invalid intermediate file: {p}")
                     return
+            # segment paths are already absolute (tempfile.gettempdir() is); one write for the list
+            body = "".join(f"file '{normalize_path_for_ffmpeg(p)}'\n" for p in sorted_videos)
             with open(concat_list_file_path, "w", encoding="utf-8") as f:
-                for p in sorted_videos:
-                    f.write(f"file '{normalize_path_for_ffmpeg(os.path.abspath(p))}'\n")
+                f.write(body)
             final_output = os.path.join(self.output_dir, self.output_name.get())
             base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
             ffmpeg_path = os.path.join(base_dir, "ffmpeg", "ffmpeg.exe")
@@ -981,7 +1465,11 @@ class AutoVideoApp:
                     "-i", normalize_path_for_ffmpeg(concat_list_file_path),
                     "-c", "copy", normalize_path_for_ffmpeg(final_output)
                 ]
-                subprocess.run(concat_cmd, check=True, stderr=subprocess.PIPE, stdout=subprocess.PIPE, startupinfo=SI, creationflags=(CREATE_NO_WINDOW if sys.platform=="win32" else 0))
+                # awaited rather than subprocess.run so the event loop thread is not parked on ffmpeg
+                proc = await asyncio.create_subprocess_exec(*concat_cmd, **_POPEN_KW)
+                c_out, c_err = await proc.communicate()
+                if proc.returncode != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, concat_cmd, output=c_out, stderr=c_err)
                 self.status.config(text=f"✅ Xong! Video đã lưu: {final_output}", foreground="darkgreen")
                 messagebox.showinfo("Hoàn tất", f"Video đã lưu:\n{final_output}")
                 self.add_log(f"[RUN {run_id}] finished successfully")
@@ -996,6 +1484,8 @@ class AutoVideoApp:
             finally:
                 self.progress['value'] = 100
         finally:
+            if csv_f is not None:
+                csv_f.close()
             try:
                 if self.create_btn:
                     self.create_btn.config(state="normal")
@@ -1010,12 +1500,24 @@ class AutoVideoApp:
 def main():
     root = tk.Tk()
     root.withdraw()
-    if not check_activation(root):
-        sys.exit(1)
-    root.deiconify()
-    root.state('zoomed')
-    app = AutoVideoApp(root)
+    state = {"ok": False}
+
+    def _start(ok):
+        if not ok:
+            root.destroy()
+            return
+        state["ok"] = True
+        root.deiconify()
+        root.state('zoomed')
+        state["app"] = AutoVideoApp(root)
+
+    check_activation(root, _start)
     root.mainloop()
+    if state.get("app") is not None:
+        state["app"].close_loop()
+    close_session()
+    if not state["ok"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
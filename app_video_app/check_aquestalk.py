@@ -6,6 +6,8 @@ import os
 import sys
 import time
 import threading
+import queue
+import concurrent.futures
 
 base = os.path.dirname(os.path.abspath(__file__))
 # path where you said the folder is:
@@ -38,43 +40,70 @@ except Exception as e:
     print("Failed to import aquestalk:", repr(e))
     sys.exit(1)
 
-def try_load_voice(name, timeout_s=3):
-    try:
-        aq = aquestalk.load(name)
-    except Exception as e:
-        return False, f"load failed: {e}"
-    # try quick synth on separate thread with timeout
-    ok = [False]
-    err = [None]
-    def worker():
+# Each probing thread hands its test synth to one long-lived helper thread
+# (kept per probing thread), so a synth can be timed out without starting a
+# new thread for every voice. A helper that hangs is abandoned and replaced.
+_local = threading.local()
+
+def _synth_worker(jobs):
+    while True:
+        aq, result_q = jobs.get()
+        ok, err = False, None
         try:
             # some wrappers use synthe or synthe_raw; try synthe first
             try:
-                r = aq.synthe("こんにちは")
-                ok[0] = True
+                aq.synthe("こんにちは")
+                ok = True
             except Exception:
                 try:
-                    _ = aq.synthe_raw("こんにちは")
-                    ok[0] = True
+                    aq.synthe_raw("こんにちは")
+                    ok = True
                 except Exception as ee:
-                    err[0] = f"synth failed: {ee}"
+                    err = f"synth failed: {ee}"
         except Exception as e:
-            err[0] = repr(e)
-    t = threading.Thread(target=worker)
-    t.start()
-    t.join(timeout_s)
-    if t.is_alive():
-        return False, "synth timeout"
-    if ok[0]:
-        return True, "ok"
-    return False, err[0] or "unknown"
+            err = repr(e)
+        result_q.put((ok, err))
+
+def _synth_jobs():
+    jobs = getattr(_local, "jobs", None)
+    if jobs is None:
+        jobs = queue.Queue()
+        threading.Thread(target=_synth_worker, args=(jobs,), daemon=True).start()
+        _local.jobs = jobs
+    return jobs
 
-for i in range(1, 21):
-    name = f"f{i}"
-    print(f"Probing voice {name} ...", end=" ", flush=True)
-    ok, info = try_load_voice(name)
-    print("=>", ok, info)
+def try_load_voice(name, timeout_s=3):
+    try:
+        aq = aquestalk.load(name)
+    except Exception as e:
+        return name, False, f"load failed: {e}"
+    result_q = queue.Queue(maxsize=1)
+    _synth_jobs().put((aq, result_q))
+    try:
+        ok, err = result_q.get(timeout=timeout_s)
+    except queue.Empty:
+        _local.jobs = None  # helper is stuck in the DLL; the next probe starts a fresh one
+        return name, False, "synth timeout"
     if ok:
-        # stop after first good voice
-        break
+        return name, True, "ok"
+    return name, False, err or "unknown"
+
+# the voice loads are independent, so probe them in parallel; each probe is
+# bounded by its own synth timeout. Results are reported in f1..f20 order so
+# the first good voice is the same on every run.
+names = [f"f{i}" for i in range(1, 21)]
+print("Probing voices " + ", ".join(names) + " ...", flush=True)
+with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+    futures = [executor.submit(try_load_voice, n) for n in names]
+first_good = None
+for fut in futures:
+    try:
+        name, ok, info = fut.result()
+    except Exception as e:
+        print("  probe error:", repr(e))
+        continue
+    print(f"  {name} =>", ok, info)
+    if ok and first_good is None:
+        first_good = name
+print("First good voice:", first_good or "none")
 print("Diagnostic finished.")
\ No newline at end of file
@@ -5,18 +5,40 @@
 # - falls back to bundled BASE_DIR/MeCab/bin if provided to init_mecab()
 # - falls back to PATH / common Program Files locations
 # - ensures the MeCab bin dir is added to DLL search path on Windows
-# - calls mecab -Oyomi, tries CP932/UTF-8/EUC-JP decodes and returns the best yomi
-# - logs the final mecab.exe path used (via optional log_callback) and writes debug files when helpful
+# - keeps one mecab -Oyomi process alive and feeds it a line per lookup, tries
+#   CP932/UTF-8/EUC-JP decodes and returns the best yomi
+# - memoizes readings so repeated lines never reach mecab twice
+# - mecab_parse(): the same persistent-process handling for default-format output
+# - logs the final mecab.exe path used (via optional log_callback) and writes debug files
+#   on failure when AUDC_MECAB_DEBUG is set
 
 import os
 import sys
 import subprocess
 import shutil
 import tempfile
-import re
-import time
+import atexit
+import itertools
+import threading
+from collections import OrderedDict
 
 TEMP_DIR = tempfile.gettempdir()
+# decoding dumps under TEMP_DIR are only written when AUDC_MECAB_DEBUG is set
+_DEBUG = bool(os.environ.get("AUDC_MECAB_DEBUG"))
+# pid + sequence keeps dump names unique (timestamps collide within a second)
+_DEBUG_SEQ = itertools.count()
+
+# (base_dir, AQUESTALK_MECAB_BIN) -> resolved mecab path (or None); cleared by init_mecab()
+_RESOLVED_EXE = {}
+# executable resolved by init_mecab(); the worker uses it before probing again
+_RESOLVED_MECAB_EXE = None
+_CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0) if sys.platform == "win32" else 0
+
+# text -> yomi is deterministic for a given dictionary, so repeated lines are served
+# from an LRU in front of the worker; failures (None) are not cached
+_YOMI_CACHE = OrderedDict()
+_YOMI_CACHE_MAX = 8192
+_YOMI_CACHE_LOCK = threading.Lock()
 
 def _add_dir_to_dll_search(dirpath):
     try:
@@ -34,8 +56,11 @@ def _add_dir_to_dll_search(dirpath):
 def init_mecab(base_dir):
     """
     Call at startup with BASE_DIR (project root). This will add bundled MeCab/bin
-    to DLL search path so subprocess and DLL loads find libmecab if present.
+    to DLL search path so subprocess and DLL loads find libmecab if present,
+    then resolves the mecab executable once for later lookups.
     """
+    global _RESOLVED_MECAB_EXE
+    reset_mecab_cache()
     # Prefer explicit env var first (user-specified bin dir)
     env_bin = os.environ.get("AQUESTALK_MECAB_BIN")
     if env_bin and os.path.isdir(env_bin):
@@ -45,6 +70,18 @@ def init_mecab(base_dir):
         bundled = os.path.join(base_dir, "MeCab", "bin")
         if os.path.isdir(bundled):
             _add_dir_to_dll_search(bundled)
+    _RESOLVED_MECAB_EXE = find_mecab_executable(base_dir)
+
+def reset_mecab_cache():
+    """
+    Forget the resolved mecab executable and stop the worker, so the next
+    lookup probes the filesystem again (e.g. after changing AQUESTALK_MECAB_BIN).
+    """
+    global _RESOLVED_MECAB_EXE
+    _RESOLVED_EXE.clear()
+    _RESOLVED_MECAB_EXE = None
+    with _YOMI_WORKER.lock:
+        _YOMI_WORKER.kill()
 
 def find_mecab_executable(base_dir=None, log_callback=None):
     """
@@ -54,7 +91,18 @@ def find_mecab_executable(base_dir=None, log_callback=None):
       2) bundled base_dir/MeCab/bin/mecab.exe (if base_dir provided)
       3) mecab in PATH (shutil.which)
       4) common Program Files locations
+    The result is cached per base_dir; only the first lookup probes the filesystem (and logs).
     """
+    key = (base_dir, os.environ.get("AQUESTALK_MECAB_BIN"))
+    try:
+        return _RESOLVED_EXE[key]
+    except KeyError:
+        pass
+    exe = _probe_mecab_executable(base_dir, log_callback)
+    _RESOLVED_EXE[key] = exe
+    return exe
+
+def _probe_mecab_executable(base_dir, log_callback):
     # 1) env override
     env_bin = os.environ.get("AQUESTALK_MECAB_BIN")
     if env_bin:
@@ -99,105 +147,333 @@ def find_mecab_executable(base_dir=None, log_callback=None):
         except Exception: pass
     return None
 
-_kana_re = re.compile(r'[ぁ-ゔァ-ヴー]')
+# hiragana ぁ-ゔ, katakana ァ-ヴ and the long-vowel mark ー
+_KANA = frozenset(map(chr, (*range(0x3041, 0x3095), *range(0x30A1, 0x30F5), 0x30FC)))
+# mecab on Windows ships a Shift_JIS (cp932) dictionary, elsewhere it is normally utf-8;
+# requests are encoded with it and replies try it first
+_MECAB_CODEC = "cp932" if sys.platform == "win32" else "utf-8"
+_DECODE_ORDER = (_MECAB_CODEC,) + tuple(e for e in ("cp932", "utf-8", "euc_jp") if e != _MECAB_CODEC)
 
 def _looks_like_yomi(s: str) -> bool:
     if not s:
         return False
-    return bool(_kana_re.search(s))
+    return not _KANA.isdisjoint(s)
 
-def _try_decode(output_bytes):
-    candidates = {}
-    for enc in ("cp932", "utf-8", "euc_jp"):
+def _decode_iter(output_bytes):
+    # decodes lazily in priority order so callers can stop at the first good one
+    for enc in _DECODE_ORDER:
         try:
-            decoded = output_bytes.decode(enc, errors="replace").strip()
-            candidates[enc] = decoded
+            yield enc, output_bytes.decode(enc, errors="replace").strip()
         except Exception:
-            candidates[enc] = None
-    return candidates
+            yield enc, None
 
-def mecab_yomi(text, base_dir=None, timeout=6, log_callback=None):
+class _MecabWorker:
     """
-    Convert text -> yomi (katakana/hiragana) by calling mecab -Oyomi.
-    Returns yomi string (decoded) or None on failure.
+    One long-lived mecab process: the dictionary is loaded once and every lookup is
+    lines in / lines out over the pipes. Callers hold .lock around spawn/roundtrip/kill.
     """
-    if not text:
-        return None
+    def __init__(self, args):
+        self.args = list(args)
+        self.proc = None
+        self.exe = None
+        self.err = None
+        self.lock = threading.Lock()
 
-    mecab_exe = find_mecab_executable(base_dir=base_dir, log_callback=log_callback)
-    if not mecab_exe:
-        return None
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def spawn(self, exe):
+        self.kill()
+        # stderr goes to a temp file rather than a pipe so a chatty mecab can never
+        # block on a full stderr buffer while we wait on stdout
+        self.err = tempfile.TemporaryFile()
+        try:
+            self.proc = subprocess.Popen([exe] + self.args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=self.err, creationflags=_CREATE_NO_WINDOW)
+        except Exception:
+            self.kill()
+            raise
+        self.exe = exe
+        return self.proc
 
-    # Prepare input bytes (prefer CP932 on Windows)
+    def kill(self):
+        proc, self.proc = self.proc, None
+        err, self.err = self.err, None
+        if proc is not None:
+            for stream in (proc.stdin, proc.stdout):
+                try: stream.close()
+                except Exception: pass
+            try:
+                proc.kill()
+                proc.wait(timeout=2)
+            except Exception:
+                pass
+        if err is not None:
+            try: err.close()
+            except Exception: pass
+
+    def read_stderr(self, limit=2048):
+        try:
+            self.err.seek(0)
+            return self.err.read(limit) or b""
+        except Exception:
+            return b""
+
+    def roundtrip(self, payload, n_inputs, deadline, is_end=None):
+        """
+        Write payload and read replies until n_inputs of them are complete (every
+        line, or every line matching is_end). Returns (lines, timed_out); lines is
+        None if the worker died or hung, in which case it has been killed.
+        """
+        proc = self.proc
+        # watchdog: a hung mecab is killed, which unblocks readline() with b""
+        timed_out = threading.Event()
+        def _expire():
+            timed_out.set()
+            proc.kill()
+        watchdog = threading.Timer(deadline, _expire)
+        watchdog.daemon = True
+        watchdog.start()
+        lines = []
+        remaining = n_inputs
+        try:
+            if n_inputs == 1 and len(payload) < 4096:
+                _feed_mecab(proc, payload)
+            else:
+                # mecab answers while we are still writing; feed it from a thread so
+                # neither side can block on a full pipe
+                threading.Thread(target=_feed_mecab, args=(proc, payload), daemon=True).start()
+            while remaining:
+                line = proc.stdout.readline()
+                if not line:
+                    break
+                lines.append(line)
+                if is_end is None or is_end(line):
+                    remaining -= 1
+        except (OSError, ValueError):
+            remaining = -1
+        finally:
+            watchdog.cancel()
+        if remaining:
+            return None, timed_out.is_set()
+        return lines, False
+
+def _feed_mecab(proc, payload):
     try:
-        input_bytes = text.encode("cp932", errors="replace")
-    except Exception:
-        input_bytes = text.encode("utf-8", errors="replace")
+        proc.stdin.write(payload)
+        proc.stdin.flush()
+    except (OSError, ValueError):
+        # worker died or was killed; the reader sees EOF and handles it
+        pass
+
+# one long-lived `mecab -Oyomi` shared by all yomi lookups
+_YOMI_WORKER = _MecabWorker(["-Oyomi"])
+# default-format workers for mecab_parse, keyed by executable path
+_PARSE_WORKERS = {}
+_PARSE_WORKERS_LOCK = threading.Lock()
+
+def _kill_all_mecab():
+    for w in [_YOMI_WORKER] + list(_PARSE_WORKERS.values()):
+        w.kill()
 
+atexit.register(_kill_all_mecab)
+
+def _get_or_spawn_mecab(base_dir=None, log_callback=None):
+    """
+    Return the running yomi worker process, starting it on first use (or after it died).
+    Caller must hold _YOMI_WORKER.lock.
+    """
+    if _YOMI_WORKER.alive():
+        return _YOMI_WORKER.proc
+
+    mecab_exe = _RESOLVED_MECAB_EXE or find_mecab_executable(base_dir=base_dir, log_callback=log_callback)
+    if not mecab_exe:
+        return None
+    if log_callback:
+        try: log_callback(f"[MeCab] starting mecab worker: {mecab_exe}") 
+        except Exception: pass
     try:
-        proc = subprocess.run([mecab_exe, "-Oyomi"], input=input_bytes, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
-        out_bytes = proc.stdout or b""
-        err_bytes = proc.stderr or b""
+        return _YOMI_WORKER.spawn(mecab_exe)
     except Exception as e:
         if log_callback:
-            try: log_callback(f"[MeCab] exception calling mecab: {e}") 
+            try: log_callback(f"[MeCab] exception starting mecab: {e}") 
             except Exception: pass
         return None
 
-    # If no stdout, decode stderr for hints
-    if not out_bytes and err_bytes:
-        decs_err = _try_decode(err_bytes)
-        debug_path = os.path.join(TEMP_DIR, f"mecab_stderr_{int(time.time())}.txt")
-        try:
-            with open(debug_path, "w", encoding="utf-8") as f:
-                f.write("mecab stderr decodings:\n")
-                for enc, dec in decs_err.items():
-                    f.write(f"--- {enc} ---\n")
-                    f.write((dec or "") + "\n\n")
-            if log_callback:
-                try: log_callback(f"[MeCab] no stdout; stderr decodings written to {debug_path}") 
+def _mecab_roundtrip(lines, base_dir, timeout, log_callback):
+    """
+    Send encoded lines to the yomi worker and read one reply line per input.
+    Respawns and retries once if the worker had gone away; a timeout kills the
+    worker without retrying. Returns (replies, err_bytes); replies is None on failure.
+    """
+    payload = b"\n".join(lines) + b"\n"
+    # the watchdog covers the whole batch, so give big batches proportionally longer
+    deadline = timeout * (1 + len(lines) // 100)
+    err_bytes = b""
+    with _YOMI_WORKER.lock:
+        for attempt in (0, 1):
+            if _get_or_spawn_mecab(base_dir=base_dir, log_callback=log_callback) is None:
+                return None, b""
+            replies, timed_out = _YOMI_WORKER.roundtrip(payload, len(lines), deadline)
+            if replies is not None:
+                return replies, b""
+            err_bytes = _YOMI_WORKER.read_stderr()
+            _YOMI_WORKER.kill()
+            if timed_out:
+                # the next call starts a fresh worker; don't burn a second timeout on this batch
+                if log_callback:
+                    try: log_callback(f"[MeCab] mecab timed out after {deadline}s") 
+                    except Exception: pass
+                break
+            if attempt == 0 and log_callback:
+                try: log_callback("[MeCab] mecab worker stopped responding; restarting") 
                 except Exception: pass
-        except Exception:
-            pass
-        return None
+        return None, err_bytes
 
-    decs_out = _try_decode(out_bytes)
-    # choose decoding that contains kana
-    best = None
-    chosen_enc = None
-    for enc in ("cp932", "utf-8", "euc_jp"):
-        candidate = decs_out.get(enc)
-        if candidate and _looks_like_yomi(candidate):
-            best = candidate
-            chosen_enc = enc
-            break
-    # fallback: pick first non-empty decoded
-    if best is None:
-        for enc in ("cp932", "utf-8", "euc_jp"):
-            candidate = decs_out.get(enc)
-            if candidate:
-                best = candidate
-                chosen_enc = enc
-                break
+def mecab_parse(text, mecab_path="mecab", timeout=8, encoding="utf-8"):
+    """
+    Run text through a persistent mecab in its default output format and return
+    the raw stdout bytes (one EOS per input line). Raises RuntimeError with mecab's
+    return code and stderr on failure or timeout, like a one-shot communicate().
+    """
+    lines = text.splitlines() or [""]
+    payload = ("\n".join(lines) + "\n").encode(encoding, errors="replace")
+    with _PARSE_WORKERS_LOCK:
+        worker = _PARSE_WORKERS.setdefault(mecab_path, _MecabWorker([]))
+    with worker.lock:
+        if not worker.alive():
+            worker.spawn(mecab_path)
+        out, timed_out = worker.roundtrip(payload, len(lines), timeout * (1 + len(lines) // 100),
+                                          is_end=lambda line: line.rstrip(b"\r\n") == b"EOS")
+        if out is None:
+            returncode = None
+            if worker.proc is not None and not timed_out:
+                try: returncode = worker.proc.wait(timeout=1)
+                except Exception: returncode = worker.proc.poll()
+            stderr_text = worker.read_stderr().decode(encoding, errors="replace").strip()
+            worker.kill()
+            if timed_out:
+                raise RuntimeError(f"mecab timed out after {timeout}s: {stderr_text}")
+            raise RuntimeError(f"mecab failed (returncode={returncode}): {stderr_text}")
+    return b"".join(out)
 
-    # write debug file with decodings (helpful to inspect)
+def _write_debug(name, parts, what, log_callback):
+    # one open + one write per dump
+    debug_path = os.path.join(TEMP_DIR, name)
     try:
-        debug_path = os.path.join(TEMP_DIR, f"mecab_yomi_debug_{int(time.time())}.txt")
         with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(f"mecab_exe: {mecab_exe}\n")
-            f.write(f"input repr: {repr(text)[:1000]}\n\n")
-            f.write("stdout decodings:\n")
-            for enc, dec in decs_out.items():
-                f.write(f"--- {enc} ---\n")
-                f.write((dec or "")[:4000] + "\n\n")
-            f.write("stderr raw (hex prefix):\n")
-            f.write((err_bytes or b"")[:1024].hex() + "\n\n")
-            f.write(f"chosen_encoding: {chosen_enc}\n")
-            f.write(f"chosen_decoded_repr: {repr(best)[:1000]}\n")
-        if log_callback:
-            try: log_callback(f"[MeCab] wrote debug to {debug_path}") 
-            except Exception: pass
+            f.write("".join(parts))
     except Exception:
-        pass
+        return
+    if log_callback:
+        try: log_callback(f"[MeCab] {what} {debug_path}") 
+        except Exception: pass
 
-    return best
\ No newline at end of file
+def _pick_yomi(out_bytes):
+    """
+    Decode one mecab reply line; returns (best, chosen_enc).
+    """
+    fallback = (None, None)
+    for enc, candidate in _decode_iter(out_bytes):
+        # choose decoding that contains kana; the platform codec usually wins on the first try
+        if candidate and _looks_like_yomi(candidate):
+            return candidate, enc
+        # fallback: first non-empty decoded
+        if candidate and fallback[0] is None:
+            fallback = (candidate, enc)
+    return fallback
+
+def _mecab_yomi_many_uncached(texts, base_dir=None, timeout=6, log_callback=None):
+    """
+    Convert a batch of texts -> yomi with one write to the persistent mecab -Oyomi
+    worker. Returns a list aligned with texts; entries are None for empty input
+    or on failure.
+    """
+    results = [None] * len(texts)
+    # mecab answers one line per input line; keep every request on a single line
+    pending = [(i, t.replace("\r", "").replace("\n", " ")) for i, t in enumerate(texts) if t]
+    if not pending:
+        return results
+
+    # Prepare input bytes: one encode pass for the whole batch (errors="replace" never raises)
+    lines = "\n".join(line for _, line in pending).encode(_MECAB_CODEC, "replace").split(b"\n")
+
+    replies, err_bytes = _mecab_roundtrip(lines, base_dir, timeout, log_callback)
+
+    if replies is None:
+        # If no stdout, decode stderr for hints
+        if _DEBUG and err_bytes:
+            # bounded: first 2 KB only, in the platform codec (errors="replace" never raises)
+            parts = [f"mecab stderr (first {len(err_bytes)} bytes as {_MECAB_CODEC}):\n",
+                     err_bytes[:2048].decode(_MECAB_CODEC, "replace"), "\n"]
+            _write_debug(f"mecab_stderr_{os.getpid()}_{next(_DEBUG_SEQ)}.txt", parts, "no stdout; stderr written to", log_callback)
+        elif log_callback:
+            try: log_callback("[MeCab] no stdout from mecab") 
+            except Exception: pass
+        return results
+
+    for (i, _), out_bytes in zip(pending, replies):
+        best, chosen_enc = _pick_yomi(out_bytes)
+        results[i] = best
+        if best is not None or not _DEBUG:
+            continue
+        # dump the decodings when nothing usable came back
+        parts = [f"mecab_exe: {_YOMI_WORKER.exe}\n", f"input repr: {repr(texts[i])[:1000]}\n\n", "stdout decodings:\n"]
+        for enc, dec in _decode_iter(out_bytes):
+            parts.append(f"--- {enc} ---\n{(dec or '')[:4000]}\n\n")
+        if out_bytes.strip():
+            parts.append(f"stdout raw (hex prefix):\n{out_bytes[:1024].hex()}\n\n")
+        parts.append(f"chosen_encoding: {chosen_enc}\n")
+        _write_debug(f"mecab_yomi_{os.getpid()}_{next(_DEBUG_SEQ)}.txt", parts, "wrote debug to", log_callback)
+
+    return results
+
+def mecab_yomi_cache_clear():
+    """
+    Drop all memoized readings (e.g. after switching MeCab dictionaries).
+    """
+    with _YOMI_CACHE_LOCK:
+        _YOMI_CACHE.clear()
+
+def mecab_yomi_many(texts, base_dir=None, timeout=6, log_callback=None):
+    """
+    Batch text -> yomi. Cached readings are returned without touching the worker;
+    only the misses (deduplicated) go to mecab in a single batch.
+    Returns a list aligned with texts; entries are None for empty input or on failure.
+    """
+    results = [None] * len(texts)
+    misses = {}
+    with _YOMI_CACHE_LOCK:
+        for i, t in enumerate(texts):
+            key = t.strip() if t else ""
+            if not key:
+                continue
+            hit = _YOMI_CACHE.get(key)
+            if hit is not None:
+                _YOMI_CACHE.move_to_end(key)
+                results[i] = hit
+            else:
+                misses.setdefault(key, []).append(i)
+    if not misses:
+        return results
+
+    keys = list(misses)
+    fresh = _mecab_yomi_many_uncached(keys, base_dir=base_dir, timeout=timeout, log_callback=log_callback)
+    with _YOMI_CACHE_LOCK:
+        for key, yomi in zip(keys, fresh):
+            if yomi is None:
+                continue
+            _YOMI_CACHE[key] = yomi
+            _YOMI_CACHE.move_to_end(key)
+            for i in misses[key]:
+                results[i] = yomi
+        while len(_YOMI_CACHE) > _YOMI_CACHE_MAX:
+            _YOMI_CACHE.popitem(last=False)
+    return results
+
+def mecab_yomi(text, base_dir=None, timeout=6, log_callback=None):
+    """
+    Convert text -> yomi (katakana/hiragana) using the persistent mecab -Oyomi worker.
+    Returns yomi string (decoded) or None on failure.
+    """
+    return mecab_yomi_many([text], base_dir=base_dir, timeout=timeout, log_callback=log_callback)[0]
\ No newline at end of file
@@ -6,9 +6,10 @@ import os
 import sys
 
 def _add_dir_to_dll_search(dirpath):
+    # returns the normalized dir when it exists (so the caller can put it on PATH), else None
     try:
         if not dirpath:
-            return
+            return None
         d = os.path.normpath(dirpath)
         if os.path.isdir(d):
             try:
@@ -16,18 +17,36 @@ def _add_dir_to_dll_search(dirpath):
                     os.add_dll_directory(d)
             except Exception:
                 pass
-            # also ensure subprocess can find dlls/exes
-            p = os.environ.get("PATH", "")
-            if d not in p:
-                os.environ["PATH"] = d + os.pathsep + p
+            return d
     except Exception:
         pass
+    return None
 
-def _safe_listdir(path):
+def _prepend_path(dirs):
+    # also ensure subprocess can find dlls/exes: one PATH write for all dirs, skipping
+    # entries already present; same precedence as prepending them one at a time
     try:
-        return os.listdir(path)
+        existing = os.environ.get("PATH", "").split(os.pathsep)
+        existing_set = set(existing)
+        to_add = [d for d in reversed(dirs) if d not in existing_set]
+        if to_add:
+            os.environ["PATH"] = os.pathsep.join(to_add + existing)
     except Exception:
-        return []
+        pass
+
+def _safe_scandir(path):
+    # yields DirEntry objects (cached is_dir, precomputed .path); unreadable dirs yield nothing
+    try:
+        with os.scandir(path) as it:
+            yield from it
+    except Exception:
+        return
+
+def _subdirs(path):
+    return [e.path for e in _safe_scandir(path) if e.is_dir()]
+
+def _has_dll(path):
+    return any(e.name[-4:].lower() == ".dll" for e in _safe_scandir(path))
 
 def _scan_and_add(base):
     # 1) Ensure base is in sys.path so `import aq_normalize` works when bundled as data
@@ -37,53 +56,38 @@ def _scan_and_add(base):
     except Exception:
         pass
 
-    # 2) Candidate folders to add to DLL search path / PATH
-    cand = []
-    cand.append(os.path.join(base, "MeCab", "bin"))
-    cand.append(os.path.join(base, "ffmpeg"))
-    cand.append(os.path.join(base, "aquestalk"))
-    cand.append(os.path.join(base, "_internal", "MeCab", "bin"))
-    cand.append(os.path.join(base, "_internal", "aquestalk"))
-    cand.append(os.path.join(base, "_internal", "ffmpeg"))
+    # 2) Candidate folders to add to DLL search path / PATH (dict keeps order, adds each once)
+    seen = {}
+    def _cand(d):
+        if d:
+            seen.setdefault(os.path.normpath(d), None)
+
+    _cand(os.path.join(base, "MeCab", "bin"))
+    _cand(os.path.join(base, "ffmpeg"))
+    _cand(os.path.join(base, "aquestalk"))
+    _cand(os.path.join(base, "_internal", "MeCab", "bin"))
+    _cand(os.path.join(base, "_internal", "aquestalk"))
+    _cand(os.path.join(base, "_internal", "ffmpeg"))
 
-    # If aquestalk has many subfolders (voices), add them if they contain DLLs
+    # If aquestalk has many subfolders (voices), add them and their nested directories
     try:
-        aqroot = os.path.join(base, "aquestalk")
-        if os.path.isdir(aqroot):
-            for entry in _safe_listdir(aqroot):
-                p = os.path.join(aqroot, entry)
-                if os.path.isdir(p):
-                    cand.append(p)
-                    # also include nested directories
-                    for sub in _safe_listdir(p):
-                        sp = os.path.join(p, sub)
-                        if os.path.isdir(sp):
-                            cand.append(sp)
+        for p in _subdirs(os.path.join(base, "aquestalk")):
+            _cand(p)
+            for sp in _subdirs(p):
+                _cand(sp)
     except Exception:
         pass
 
     # Add any immediate subfolder of base that contains .dll files
     try:
-        for entry in _safe_listdir(base):
-            p = os.path.join(base, entry)
-            if os.path.isdir(p):
-                for fn in _safe_listdir(p):
-                    if fn.lower().endswith(".dll"):
-                        cand.append(p)
-                        break
+        for p in _subdirs(base):
+            if _has_dll(p):
+                _cand(p)
     except Exception:
         pass
 
-    # Unique and add
-    seen = set()
-    for d in cand:
-        if not d:
-            continue
-        nd = os.path.normpath(d)
-        if nd in seen:
-            continue
-        seen.add(nd)
-        _add_dir_to_dll_search(nd)
+    added = [d for d in map(_add_dir_to_dll_search, seen) if d]
+    _prepend_path(added)
 
 # Run only for frozen onefile execution
 try:
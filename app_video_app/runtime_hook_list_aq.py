@@ -1,10 +1,11 @@
 # runtime_hook_list_aq.py
 # Debug runtime hook to log what's extracted under sys._MEIPASS for aquestalk.
 # This is harmless and helps confirm DLLs are present in the onefile extracted folder.
+# Only runs when AUDC_LIST_AQ is set, so normal launches skip the tree walk and file write.
 import sys, os, traceback
 
 try:
-    if getattr(sys, 'frozen', False):
+    if getattr(sys, 'frozen', False) and os.environ.get('AUDC_LIST_AQ'):
         base = getattr(sys, '_MEIPASS', None)
         if base:
             aq = os.path.join(base, 'aquestalk')
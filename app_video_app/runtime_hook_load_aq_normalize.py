@@ -3,9 +3,31 @@
 # Avoids using importlib.machinery directly to prevent "module 'importlib' has no attribute 'machinery'".
 import sys
 import os
+import re
+import codecs
 import traceback
 import importlib.util
 
+# PEP 263 coding declaration (only honoured on the first two lines)
+_CODING_RE = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)")
+_FALLBACK_ENCODINGS = ("utf-8", "cp932", "latin-1")
+
+def _candidate_encodings(raw):
+    # the declared encoding (BOM, coding cookie, else utf-8) first; the rest only if it fails
+    if raw.startswith(codecs.BOM_UTF8):
+        first = "utf-8-sig"
+    else:
+        first = "utf-8"
+        for line in raw[:200].splitlines()[:2]:
+            m = _CODING_RE.match(line)
+            if m:
+                try:
+                    first = codecs.lookup(m.group(1).decode("ascii")).name
+                except Exception:
+                    pass
+                break
+    return [first] + [e for e in _FALLBACK_ENCODINGS if codecs.lookup(e).name != first]
+
 def _try_load_path(path):
     try:
         # read bytes and try decodings to detect encoding issues
@@ -15,11 +37,16 @@ def _try_load_path(path):
         print(f"[runtime-hook] cannot read {path}: {e}")
         return False, f"read-failed:{e}"
 
-    for enc in ("utf-8-sig", "utf-8", "cp932", "latin-1"):
+    tried = set()
+    for enc in _candidate_encodings(raw):
         try:
             src = raw.decode(enc)
         except Exception:
             continue
+        # e.g. pure-ASCII source decodes identically everywhere; don't recompile it
+        if src in tried:
+            continue
+        tried.add(src)
         # Syntax check
         try:
             codeobj = compile(src, path, "exec")
@@ -76,11 +103,12 @@ def _add_native_dirs(base):
         # also add any subfolder inside aquestalk
         aqroot = os.path.join(base, "aquestalk")
         if os.path.isdir(aqroot):
-            for entry in os.listdir(aqroot):
-                p = os.path.join(aqroot, entry)
-                if os.path.isdir(p):
-                    cand.append(p)
+            with os.scandir(aqroot) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        cand.append(entry.path)
         seen = set()
+        added = []
         for d in cand:
             nd = os.path.normpath(d)
             if not nd or nd in seen:
@@ -92,9 +120,13 @@ def _add_native_dirs(base):
                         os.add_dll_directory(nd)
                 except Exception:
                     pass
-                p = os.environ.get("PATH", "")
-                if nd not in p:
-                    os.environ["PATH"] = nd + os.pathsep + p
+                added.append(nd)
+        # one PATH write for all dirs; same precedence as prepending them one at a time
+        existing = os.environ.get("PATH", "").split(os.pathsep)
+        existing_set = set(existing)
+        to_add = [d for d in reversed(added) if d not in existing_set]
+        if to_add:
+            os.environ["PATH"] = os.pathsep.join(to_add + existing)
     except Exception:
         pass
 
@@ -44,16 +44,21 @@ def hira_to_kata(s: str) -> str:
     return "".join(out_chars)
 
 
+_WS_RE = re.compile(r"\s+")
+# ascii punctuation -> japanese, quotes dropped
+_YOMI_PUNCT_TRANS = str.maketrans({
+    ",": "、", ".": "。", "?": "？", "!": "！", ";": "、", ":": "、",
+    "“": None, "”": None, "‘": None, "’": None, '"': None, "'": None,
+})
+_NON_KATAKANA_RE = re.compile(r"[^ァ-ヴー\u3000\s、。！？]")
+
+
 def sanitize_yomi_keep_katakana(yomi: str) -> str:
     if not yomi:
         return yomi
-    s = hira_to_kata(yomi)
-    s = s.replace(",", "、").replace(".", "。").replace("?", "？").replace("!", "！")
-    s = s.replace(";", "、").replace(":", "、")
-    s = s.replace("“", "").replace("”", "").replace("‘", "").replace("’", "")
-    s = s.replace('"', "").replace("'", "")
-    s = re.sub(r"[^ァ-ヴー\u3000\s、。！？]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = hira_to_kata(yomi).translate(_YOMI_PUNCT_TRANS)
+    s = _NON_KATAKANA_RE.sub("", s)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 
@@ -63,12 +68,15 @@ def to_fullwidth_digits(s: str) -> str:
     return s.translate(str.maketrans("0123456789", "０１２３４５６７８９"))
 
 
+_NON_JAPANESE_RE = re.compile(r"[^\u3000-\u30FF\u4E00-\u9FFF\uFF01-\uFF60\u3001\u3002\u30FB\u30FC\s、。！？0-9０-９]")
+
+
 def sanitize_for_aquestalk_fallback(text: str) -> str:
     # keep Japanese and common punctuation used by AquesTalk
     if not text:
         return text
-    s = re.sub(r"[^\u3000-\u30FF\u4E00-\u9FFF\uFF01-\uFF60\u3001\u3002\u30FB\u30FC\s、。！？0-9０-９]", "", text)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _NON_JAPANESE_RE.sub("", text)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 
@@ -131,13 +139,38 @@ _COMBO_MAPPING = {
 }
 
 
+# every base key is a single character, so the whole mapping is one translate pass
+_BASE_TRANS = str.maketrans(_BASE_MAPPING)
+
+
+def _combo_table():
+    # the old sequential replace also caught chains where one expansion creates the next
+    # key (トゥェ -> トウェ -> トウエ); add those as longer keys so one scan matches it
+    table = dict(_COMBO_MAPPING)
+    keys = list(_COMBO_MAPPING)
+    for i, k1 in enumerate(keys):
+        v1 = _COMBO_MAPPING[k1]
+        for k2 in keys[i + 1:]:
+            if v1.endswith(k2[0]):
+                table[k1 + k2[1:]] = v1[:-1] + _COMBO_MAPPING[k2]
+    return table
+
+
+_COMBO_TABLE = _combo_table()
+# one left-to-right pass over the text, longest key first at each position
+_COMBO_RE = re.compile("|".join(map(re.escape, sorted(_COMBO_TABLE, key=len, reverse=True))))
+# every combo ends in a small kana; text without one has nothing to expand
+_COMBO_SMALL_RE = re.compile("[" + "".join(sorted({k[-1] for k in _COMBO_TABLE})) + "]")
+
 _CONTROL_RE = re.compile(r"[\u0000-\u001F\u007F-\u009F]")
+_ASCII_ALPHA_RE = re.compile(r"[A-Za-z]")
+_NON_KANA_RE = re.compile(r"[^\u3040-\u30FF\u3000\s、。！？ー]")
 
 
-def _apply_mapping(s: str, mapping: dict) -> str:
-    for k, v in mapping.items():
-        s = s.replace(k, v)
-    return s
+def _apply_combo(s: str) -> str:
+    if not _COMBO_SMALL_RE.search(s):
+        return s
+    return _COMBO_RE.sub(lambda m: _COMBO_TABLE[m.group(0)], s)
 
 
 def normalize_for_aquestalk(text: str, to_hiragana: bool = False) -> str:
@@ -156,11 +189,10 @@ def normalize_for_aquestalk(text: str, to_hiragana: bool = False) -> str:
         jaconv = None
 
     s = unicodedata.normalize("NFKC", text)
-    s = _apply_mapping(s, _BASE_MAPPING)
-    s = _apply_mapping(s, _COMBO_MAPPING)
+    s = _apply_combo(s.translate(_BASE_TRANS))
     s = _CONTROL_RE.sub("", s)
-    s = re.sub(r"[A-Za-z]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _ASCII_ALPHA_RE.sub("", s)
+    s = _WS_RE.sub(" ", s).strip()
     if to_hiragana and jaconv:
         try:
             s = jaconv.kata2hira(s)
@@ -187,20 +219,18 @@ def generate_candidate_variants(katakana_text: str, prefer_hiragana: bool = Fals
     candidates.append(t)
 
     # base mapping
-    mapped_base = _apply_mapping(t, _BASE_MAPPING)
+    mapped_base = t.translate(_BASE_TRANS)
     if mapped_base not in candidates:
         candidates.append(mapped_base)
 
     # combo expanded (apply combo mapping after base)
-    mapped_combo = _apply_mapping(mapped_base, _COMBO_MAPPING)
+    mapped_combo = _apply_combo(mapped_base)
     if mapped_combo not in candidates:
         candidates.append(mapped_combo)
 
     # try removing small-kana by replacing with expanded forms (again defensive)
     # (sometimes doubling replacement helps; we ensure uniqueness)
-    mapped_combo2 = mapped_combo
-    for k, v in _COMBO_MAPPING.items():
-        mapped_combo2 = mapped_combo2.replace(k, v)
+    mapped_combo2 = _apply_combo(mapped_combo)
     if mapped_combo2 not in candidates:
         candidates.append(mapped_combo2)
 
@@ -220,8 +250,8 @@ def generate_candidate_variants(katakana_text: str, prefer_hiragana: bool = Fals
         pass
 
     # last-resort: remove characters outside katakana/hiragana/basic punctuation
-    fallback = re.sub(r"[^\u3040-\u30FF\u3000\s、。！？ー]", "", mapped_combo)
-    fallback = re.sub(r"\s+", " ", fallback).strip()
+    fallback = _NON_KANA_RE.sub("", mapped_combo)
+    fallback = _WS_RE.sub(" ", fallback).strip()
     if fallback and fallback not in candidates:
         candidates.append(fallback)
 
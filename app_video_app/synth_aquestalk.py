@@ -14,7 +14,7 @@ import importlib
 import threading
 from typing import List
 
-_ALLOWED_RE = re.compile(r'[^\u3040-\u309F\u30A0-\u30FF\u3001\u3002\uFF1F\uFF01\u300C\u300D\u30FB\u3000\uFF0C\uFF08\uFF09\u300E\u300F\u30FC\s]')
+from aq_common import DROP_TABLE, parse_mecab_output
 
 # simple in-process cache for loaded voice objects
 _VOICE_CACHE = {}
@@ -63,33 +63,13 @@ def _mecab_reading_utf8(text: str, timeout: int = 8) -> str:
     if proc.returncode != 0:
         raise RuntimeError("MeCab lỗi: " + stderr_bytes.decode("utf-8", errors="ignore"))
     stdout_text = stdout_bytes.decode("utf-8", errors="replace")
-    readings = []
-    for line in stdout_text.splitlines():
-        if line == "EOS" or not line.strip():
-            continue
-        if '\t' in line:
-            surface, feats = line.split('\t', 1)
-            cols = feats.split(',')
-            pron = None
-            if len(cols) > 7 and cols[7] != '*':
-                pron = cols[7]
-            elif len(cols) > 6 and cols[6] != '*':
-                pron = cols[6]
-            else:
-                pron = surface
-            readings.append(pron)
-        else:
-            parts = line.split(',')
-            if parts:
-                readings.append(parts[0])
-    return ''.join(readings)
+    return parse_mecab_output(stdout_text)
 
 def _sanitize_for_aquestalk(text: str) -> str:
     text = text.replace('-', 'ー')
     text = text.replace(',', '、').replace('?', '？').replace('!', '！').replace('.', '。')
     text = jaconv.h2z(text, digit=True, ascii=False)
-    text = re.sub(r'[\(\)（）\[\]［］]', '', text)
-    cleaned = _ALLOWED_RE.sub('', text)
+    cleaned = text.translate(DROP_TABLE)
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     cleaned = jaconv.kata2hira(cleaned)
     return cleaned
@@ -29,6 +29,8 @@ import shutil
 import time
 import uuid
 import hashlib
+import functools
+from collections.abc import Mapping
 
 # Configuration from environment (allow user override)
 # AUTO_VIDEO_MAX_THREADS: maximum CPU threads used by app (thread pool + ffmpeg -threads cap). Default 24.
@@ -38,10 +40,17 @@ _MAX_THREADS_ENV = int(os.environ.get("AUTO_VIDEO_MAX_THREADS", "24"))
 _AUTO_VIDEO_PREFER_GPU = os.environ.get("AUTO_VIDEO_PREFER_GPU", "1") == "1"
 _AUTO_VIDEO_FORCE_ENCODER = os.environ.get("AUTO_VIDEO_FORCE_ENCODER", "").strip()
 
-# Ensure positive
-_MAX_THREADS = max(1, _MAX_THREADS_ENV)
+# physical cores (psutil when installed); the thread cap never goes above this
+try:
+    import psutil
+    _PHYS_CORES = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+except Exception:
+    _PHYS_CORES = os.cpu_count() or 1
+# Ensure positive, clamped to the physical cores. get_max_threads() narrows it
+# further once a GPU encoder is in use; the GUI imports both.
+MAX_CPU_THREADS = min(max(1, _MAX_THREADS_ENV), _PHYS_CORES)
 # threads string used for ffmpeg '-threads'
-_FFMPEG_THREADS_STR = str(min(_MAX_THREADS, max(1, (os.cpu_count() or 1))))
+_FFMPEG_THREADS_STR = str(min(MAX_CPU_THREADS, max(1, (os.cpu_count() or 1))))
 
 # Try import normalization helper (optional)
 try:
@@ -72,18 +81,28 @@ if sys.platform == "win32":
 else:
     CREATE_NO_WINDOW = 0
     si = None
+CFLAGS = CREATE_NO_WINDOW if sys.platform == "win32" else 0
 
 # temp dir and executor
 output_temp_dir = tempfile.gettempdir()
-# ThreadPoolExecutor capped by _MAX_THREADS so CPU usage won't spawn more than this many worker threads
-executor = ThreadPoolExecutor(max_workers=_MAX_THREADS)
+# ThreadPoolExecutor capped by get_max_threads() so CPU usage won't spawn more than this many
+# worker threads; built on first use, once the encoder probe has an answer
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+def _get_executor():
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=get_max_threads())
+        return _EXECUTOR
 
 # Minimum sample rate to enforce for AquesTalk outputs to avoid pitch/speed artifacts
 MIN_SR_ENFORCE = int(os.environ.get("AQUESTALK_MIN_SR", "16000"))
 
 # Try import mecab_helper (project may provide it)
 try:
-    from mecab_helper import init_mecab, mecab_yomi, find_mecab_executable
+    from mecab_helper import init_mecab, mecab_yomi, mecab_yomi_many, find_mecab_executable
     try:
         init_mecab(BASE_DIR)
     except Exception:
@@ -91,6 +110,8 @@ try:
 except Exception:
     def mecab_yomi(text, base_dir=None, timeout=6, log_callback=None):
         return None
+    def mecab_yomi_many(texts, base_dir=None, timeout=6, log_callback=None):
+        return [None] * len(texts)
     def find_mecab_executable(base_dir=None):
         candidate = os.path.join(base_dir or BASE_DIR, "MeCab", "bin", "mecab.exe")
         return candidate if os.path.exists(candidate) else None
@@ -121,7 +142,7 @@ try:
 except Exception:
     _HAS_AQ_NORMALIZE = False
 _dbg(f"[Init] aq_normalize present: {_HAS_AQ_NORMALIZE}")
-_dbg(f"[Init] AUTO_VIDEO_MAX_THREADS={_MAX_THREADS}, AUTO_VIDEO_PREFER_GPU={_AUTO_VIDEO_PREFER_GPU}, AUTO_VIDEO_FORCE_ENCODER='{_AUTO_VIDEO_FORCE_ENCODER}', ffmpeg -threads={_FFMPEG_THREADS_STR}")
+_dbg(f"[Init] AUTO_VIDEO_MAX_THREADS={MAX_CPU_THREADS}, AUTO_VIDEO_PREFER_GPU={_AUTO_VIDEO_PREFER_GPU}, AUTO_VIDEO_FORCE_ENCODER='{_AUTO_VIDEO_FORCE_ENCODER}', ffmpeg -threads={_FFMPEG_THREADS_STR}")
 
 # ---------------- FFmpeg / probe helpers ------------------------------
 def get_ffmpeg_path():
@@ -136,6 +157,8 @@ def get_ffprobe_path():
         return p
     return shutil.which("ffprobe") or "ffprobe"
 
+# pure string op, called for every ffmpeg argument and concat entry
+@functools.lru_cache(maxsize=4096)
 def normalize_path_for_ffmpeg(path):
     return os.path.normpath(path).replace('\\', '/')
 
@@ -307,6 +330,19 @@ def detect_best_encoder():
         _dbg(f"[DetectEncoder] chosen encoder: {_ENCODER_CHOICE}")
         return _ENCODER_CHOICE
 
+_GPU_ENCODERS = frozenset(("h264_nvenc", "h264_amf", "h264_qsv"))
+
+def get_max_threads():
+    """
+    Thread cap shared by the GUI and the render executor: MAX_CPU_THREADS, further
+    clamped to 2-4 when detect_best_encoder() picked NVENC/AMF/QSV, so the host
+    threads feeding the GPU encoder are not starved. Without a GPU encoder the
+    physical-core cap applies, whatever AUTO_VIDEO_PREFER_GPU says.
+    """
+    if detect_best_encoder() in _GPU_ENCODERS:
+        return min(MAX_CPU_THREADS, max(2, min(4, _PHYS_CORES)))
+    return MAX_CPU_THREADS
+
 def _start_encoder_probe_background():
     def worker():
         detect_best_encoder()
@@ -317,7 +353,7 @@ _start_encoder_probe_background()
 def run_ffmpeg_with_fallback(cmd, encoder_gpu, fallback_encoder="libx264", si=None, log_callback=None):
     try:
         _dbg(f"[FFmpeg] running: {' '.join(cmd)}", log_callback=log_callback)
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si, creationflags=(CREATE_NO_WINDOW if sys.platform=="win32" else 0))
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si, creationflags=CFLAGS)
         return True
     except subprocess.CalledProcessError as e:
         try:
@@ -334,7 +370,7 @@ def run_ffmpeg_with_fallback(cmd, encoder_gpu, fallback_encoder="libx264", si=No
                     cmd2 = list(cmd)
                     cmd2[idx+1] = fallback_encoder
                     try:
-                        subprocess.run(cmd2, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si, creationflags=(CREATE_NO_WINDOW if sys.platform=="win32" else 0))
+                        subprocess.run(cmd2, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si, creationflags=CFLAGS)
                         if log_callback:
                             try: log_callback(f"[FFmpeg] fallback to {fallback_encoder} succeeded")
                             except Exception: pass
@@ -709,7 +745,7 @@ def overlay_icon_ab(
     cmd += ["-c:v", encoder_choice, normalize_path_for_ffmpeg(str(output_path))]
 
     _dbg(f"[overlay_icon_ab] running ffmpeg for overlay (input_codec={input_codec} input_sr={input_sr}) encoder={encoder_choice}", log_callback=log_callback)
-    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si, creationflags=(CREATE_NO_WINDOW if sys.platform=="win32" else 0))
+    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=si, creationflags=CFLAGS)
 
 # ---------------- per-sentence logging helper --------------------------
 def _log_sentence_result(index, original, prepped, yomi_raw, yomi_clean, text_to_synth, voice_name, result, extra_msg=None):
@@ -787,9 +823,16 @@ async def synthesize_aquestalk_clauses(original_text, voice, out_wav, speed, log
         except Exception as e:
             return False, str(e or "")
 
+    # read every clause through mecab in one batch instead of one round-trip per clause
+    synth_texts = [re.sub(r'[、，,]+$','', clause_text).strip() or clause_text or "" for clause_text, _ in clauses]
+    try:
+        clause_yomi = mecab_yomi_many(synth_texts, base_dir=BASE_DIR, log_callback=log_callback)
+    except Exception:
+        clause_yomi = [None] * len(clauses)
+
     try:
         for i, (clause_text, delim) in enumerate(clauses):
-            synth_text = re.sub(r'[、，,]+$','', clause_text).strip() or clause_text or ""
+            synth_text = synth_texts[i]
             tmp_out_base = os.path.join(output_temp_dir, f"aquestalk_clause_{uuid.uuid4().hex}_{i}")
             tmp_out = tmp_out_base + ".wav"
 
@@ -800,11 +843,7 @@ async def synthesize_aquestalk_clauses(original_text, voice, out_wav, speed, log
             candidates.append(("original", synth_text))
 
             try:
-                y = None
-                try:
-                    y = mecab_yomi(synth_text, base_dir=BASE_DIR, log_callback=log_callback)
-                except Exception:
-                    y = None
+                y = clause_yomi[i]
                 if not y:
                     y = get_mecab_yomi_via_exe(synth_text, base_dir=BASE_DIR, log_callback=log_callback, timeout=6)
                 if y:
@@ -1005,7 +1044,7 @@ async def generate_tts_audio(sentence, speaker_id, output_path, rate=1.0, voice_
     try:
         if normalize_for_aquestalk:
             to_hira_flag = False
-            if isinstance(config, dict) and config.get("aquestalk_force_hiragana", False):
+            if isinstance(config, Mapping) and config.get("aquestalk_force_hiragana", False):
                 to_hira_flag = True
             try:
                 normalized_prepped = normalize_for_aquestalk(prepped, to_hiragana=to_hira_flag)
@@ -1019,7 +1058,7 @@ async def generate_tts_audio(sentence, speaker_id, output_path, rate=1.0, voice_
 
     force_clause = False
     try:
-        if config and isinstance(config, dict) and config.get("force_clause", False):
+        if config and isinstance(config, Mapping) and config.get("force_clause", False):
             force_clause = True
         if os.environ.get("AQUESTALK_ALWAYS_CLAUSE", "0") == "1":
             force_clause = True
@@ -1138,7 +1177,7 @@ async def generate_tts_audio(sentence, speaker_id, output_path, rate=1.0, voice_
     voice_candidates = [voice_name]
     try:
         allow_voice_fallback = False
-        if config and isinstance(config, dict):
+        if config and isinstance(config, Mapping):
             allow_voice_fallback = bool(config.get("aquestalk_try_other_voices", False))
         if allow_voice_fallback:
             if 'list_aquestalk_voices' in globals() and callable(list_aquestalk_voices):
@@ -1154,11 +1193,11 @@ async def generate_tts_audio(sentence, speaker_id, output_path, rate=1.0, voice_
 
     tried_clause_fallback = False
     # Allow overriding number of retries per text via config; if aggressive requested we increase it.
-    PER_TEXT_RETRIES = int(config.get("aquestalk_per_text_retries", 2)) if config and isinstance(config, dict) else 2
-    aggressive_retry_enabled = bool(config.get("aquestalk_aggressive_retry", False)) if config and isinstance(config, dict) else False
+    PER_TEXT_RETRIES = int(config.get("aquestalk_per_text_retries", 2)) if config and isinstance(config, Mapping) else 2
+    aggressive_retry_enabled = bool(config.get("aquestalk_aggressive_retry", False)) if config and isinstance(config, Mapping) else False
     if aggressive_retry_enabled:
         PER_TEXT_RETRIES = max(PER_TEXT_RETRIES, 4)
-    BACKOFF_BASE = float(config.get("aquestalk_backoff_base", 0.35)) if config and isinstance(config, dict) else 0.35
+    BACKOFF_BASE = float(config.get("aquestalk_backoff_base", 0.35)) if config and isinstance(config, Mapping) else 0.35
 
     # Track which aggressive alts we already injected to avoid duplication
     injected_aggressive = set()
@@ -1318,10 +1357,28 @@ async def generate_tts_audio(sentence, speaker_id, output_path, rate=1.0, voice_
 # -------------------------
 # VoiceVox / Edge helpers (unchanged)
 # -------------------------
+# One keep-alive session for every VOICEVOX request (speaker list, audio_query,
+# synthesis) so parallel renders reuse pooled connections to the engine.
+_VV_SESSION = None
+_VV_SESSION_LOCK = threading.Lock()
+
+def get_voicevox_session():
+    global _VV_SESSION
+    if _VV_SESSION is None:
+        with _VV_SESSION_LOCK:
+            if _VV_SESSION is None:
+                from requests.adapters import HTTPAdapter
+                sess = requests.Session()
+                sess.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=max(8, MAX_CPU_THREADS)))
+                sess.headers["Connection"] = "keep-alive"
+                _VV_SESSION = sess
+    return _VV_SESSION
+
 async def generate_voicevox_audio(sentence, speaker_id, output_path, rate=1.0):
     VOICEVOX_API_BASE = "http://127.0.0.1:50021"
+    session = get_voicevox_session()
     try:
-        query_response = await asyncio.to_thread(lambda: requests.post(
+        query_response = await asyncio.to_thread(lambda: session.post(
             f"{VOICEVOX_API_BASE}/audio_query",
             params={"text": sentence, "speaker": speaker_id},
             timeout=30
@@ -1331,7 +1388,7 @@ async def generate_voicevox_audio(sentence, speaker_id, output_path, rate=1.0):
         audio_query["speedScale"] = rate
         if not output_path.lower().endswith(".wav"):
             output_path = output_path.rsplit(".", 1)[0] + ".wav"
-        audio_response = await asyncio.to_thread(lambda: requests.post(
+        audio_response = await asyncio.to_thread(lambda: session.post(
             f"{VOICEVOX_API_BASE}/synthesis",
             params={"speaker": speaker_id},
             json=audio_query,
@@ -1487,8 +1544,10 @@ async def render_sentence(
         encoder_choice = detect_best_encoder()
         if encoder_choice in ["h264_nvenc", "h264_amf", "h264_qsv"]:
             encoder_preset_option = []
-        # set threads cap for ffmpeg
-        ff_threads_arg = ['-threads', _FFMPEG_THREADS_STR]
+        # set threads cap for ffmpeg; the GUI passes a per-job share of the cores
+        # when it runs several renders at once
+        ff_threads = str((config or {}).get("ffmpeg_threads") or _FFMPEG_THREADS_STR)
+        ff_threads_arg = ['-threads', ff_threads]
 
         if is_video_input:
             norm_video_path = normalize_path_for_ffmpeg(img_or_video)
@@ -1517,8 +1576,8 @@ async def render_sentence(
             cmd = [get_ffmpeg_path(), '-y'] + ff_threads_arg + ['-loop', '1', '-i', norm_img_path, '-i', norm_audio, '-i', norm_sub_path,
                    '-filter_complex', filter_complex, '-map', '[v]', '-map', '[outa]', '-c:v', encoder_choice, '-r', '25'] + encoder_preset_option + audio_opts + ['-shortest', temp_out]
 
-        _dbg(f"[Render] idx={index} ffmpeg cmd length {len(cmd)} encoder={encoder_choice} -threads={_FFMPEG_THREADS_STR}", log_callback=log_callback)
-        ok = await asyncio.get_event_loop().run_in_executor(executor, lambda: run_ffmpeg_with_fallback(cmd, encoder_gpu=encoder_choice, fallback_encoder="libx264", si=si, log_callback=log_callback))
+        _dbg(f"[Render] idx={index} ffmpeg cmd length {len(cmd)} encoder={encoder_choice} -threads={ff_threads}", log_callback=log_callback)
+        ok = await asyncio.get_event_loop().run_in_executor(_get_executor(), lambda: run_ffmpeg_with_fallback(cmd, encoder_gpu=encoder_choice, fallback_encoder="libx264", si=si, log_callback=log_callback))
         if ok and os.path.exists(temp_out) and os.path.getsize(temp_out) > 1024:
             if log_callback:
                 try: log_callback(f"[Render] idx={index} ffmpeg OK")